@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.common"
+
+    def ready(self):
+        from . import cache, metrics
+
+        cache.track_models()
+        metrics.register_gauge("query_cache.hit_rate", cache.hit_rate)
+        if settings.CACHEOPS_ENABLED:
+            from cacheops.signals import cache_read
+
+            cache_read.connect(cache.record_cacheops_read)
@@ -0,0 +1,141 @@
+"""
+Publish/subscribe broker for realtime events.
+
+With REALTIME_REDIS set, messages go through Redis pub/sub, so every
+server process receives them. Otherwise InMemoryBroker delivers them to
+subscribers in this process only. Subscribers use the same subset of the
+redis-py asyncio interface with either: pubsub(), then subscribe(),
+unsubscribe(), get_message() and aclose() on it.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+from . import metrics
+
+# Messages buffered per subscriber before new ones are dropped
+QUEUE_SIZE = 1000
+
+_broker = None
+_redis = None
+
+
+class InMemoryPubSub:
+    """A subscription to an InMemoryBroker, bound to the running loop."""
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(QUEUE_SIZE)
+        self.channels = set()
+
+    @property
+    def subscribed(self):
+        return bool(self.channels)
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+        self._broker._subscribe(self, channels)
+
+    async def unsubscribe(self, *channels):
+        channels = set(channels or self.channels)
+        self.channels -= channels
+        self._broker._unsubscribe(self, channels)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        """The next message, or None after timeout seconds (None: wait)."""
+        if timeout is None:
+            return await self._queue.get()
+        try:
+            if timeout <= 0:
+                return self._queue.get_nowait()
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except (asyncio.QueueEmpty, asyncio.TimeoutError):
+            return None
+
+    async def aclose(self):
+        await self.unsubscribe()
+
+    def _deliver(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            metrics.increment("realtime.dropped")
+
+
+class InMemoryBroker:
+    """
+    Pub/sub within one process. Messages may be published from any
+    thread and are handed to each subscriber on its own event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def pubsub(self):
+        return InMemoryPubSub(self)
+
+    async def publish(self, channel, message):
+        return self.publish_nowait(channel, message)
+
+    def publish_nowait(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        payload = {
+            "type": "message",
+            "pattern": None,
+            "channel": channel,
+            "data": message,
+        }
+        for subscriber in subscribers:
+            subscriber._loop.call_soon_threadsafe(subscriber._deliver, payload)
+        return len(subscribers)
+
+    def _subscribe(self, subscriber, channels):
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscriber)
+
+    def _unsubscribe(self, subscriber, channels):
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+def get_broker():
+    """
+    The broker subscribers use: a redis.asyncio client when
+    REALTIME_REDIS is set, otherwise the process-wide InMemoryBroker.
+    """
+    global _broker
+    if _broker is None:
+        if settings.REALTIME_REDIS:
+            import redis.asyncio
+
+            _broker = redis.asyncio.from_url(
+                settings.REALTIME_REDIS, decode_responses=True
+            )
+        else:
+            _broker = InMemoryBroker()
+    return _broker
+
+
+def publish(channel, message):
+    """Publishes a str message; callable from sync code in any thread."""
+    global _redis
+    metrics.increment("realtime.published")
+    if not settings.REALTIME_REDIS:
+        return get_broker().publish_nowait(channel, message)
+    if _redis is None:
+        import redis
+
+        _redis = redis.Redis.from_url(
+            settings.REALTIME_REDIS, decode_responses=True
+        )
+    return _redis.publish(channel, message)
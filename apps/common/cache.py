@@ -0,0 +1,161 @@
+"""
+Query cache for read-mostly lookups.
+
+With QUERY_CACHE_ENABLED and CACHEOPS_REDIS set, django-cacheops does the
+caching and invalidates by the conditions of the sample querysets.
+Without Redis, results are kept in Django's default cache (local memory
+unless configured otherwise) and every save or delete of a sample model
+bumps a per-model version, which invalidates all results depending on it.
+The models are taken from CACHEOPS when the app is ready, so every process
+bumps their versions, including processes that never cached anything.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+
+_MISSING = object()
+_tracked_models = set()
+
+
+def _model_of(sample):
+    if isinstance(sample, type) and issubclass(sample, Model):
+        return sample
+    if isinstance(sample, Model):
+        return sample.__class__
+    return sample.model
+
+
+def _sample_key(sample):
+    if isinstance(sample, Model):
+        return f"{sample._meta.label_lower}:{sample.pk}"
+    if isinstance(sample, type):
+        return sample._meta.label_lower
+    return str(sample.query)
+
+
+def track_models():
+    """
+    Tracks the models configured in CACHEOPS ("app.model" or "app.*").
+    Called from CommonConfig.ready().
+    """
+    for model in apps.get_models():
+        meta = model._meta
+        if {meta.label_lower, f"{meta.app_label}.*", "*.*"} & set(
+            settings.CACHEOPS
+        ):
+            _tracked_models.add(model)
+
+
+def _version_key(model):
+    return f"querycache:version:{model._meta.label_lower}"
+
+
+def cached_as(*samples, timeout=None):
+    """
+    Caches the result of a function until any of the sample querysets,
+    models or objects change, like cacheops.cached_as().
+    """
+    if settings.CACHEOPS_ENABLED:
+        from cacheops import cached_as as cacheops_cached_as
+
+        return cacheops_cached_as(*samples, timeout=timeout)
+
+    if timeout is None:
+        timeout = settings.CACHEOPS_DEFAULTS["timeout"]
+    models = {_model_of(sample) for sample in samples}
+    untracked = models - _tracked_models
+    if untracked:
+        labels = ", ".join(sorted(m._meta.label_lower for m in untracked))
+        raise ImproperlyConfigured(
+            f"Add {labels} to CACHEOPS, so that changes to them "
+            "invalidate cached results in every process."
+        )
+    version_keys = sorted(_version_key(model) for model in models)
+    samples_key = [_sample_key(sample) for sample in samples]
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not settings.QUERY_CACHE_ENABLED:
+                return func(*args, **kwargs)
+
+            versions = cache.get_many(version_keys)
+            raw_key = repr(
+                (
+                    func.__module__,
+                    func.__qualname__,
+                    args,
+                    sorted(kwargs.items()),
+                    samples_key,
+                    [versions.get(key, 0) for key in version_keys],
+                )
+            )
+            key = "querycache:" + hashlib.md5(raw_key.encode()).hexdigest()
+
+            result = cache.get(key, _MISSING)
+            record_read(hit=result is not _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                cache.set(key, result, timeout)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_obj(obj):
+    """
+    Drops cached results that may depend on obj.
+    Needed after queryset.update(), which sends no model signals.
+    """
+    if not settings.QUERY_CACHE_ENABLED:
+        return
+    if settings.CACHEOPS_ENABLED:
+        from cacheops import invalidate_obj as cacheops_invalidate_obj
+
+        cacheops_invalidate_obj(obj)
+        return
+    _bump_version(obj.__class__)
+
+
+def _bump_version(model):
+    key = _version_key(model)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_on_change(sender, **kwargs):
+    if sender in _tracked_models and not settings.CACHEOPS_ENABLED:
+        _bump_version(sender)
+
+
+def record_read(hit):
+    metrics.increment("query_cache.hits" if hit else "query_cache.misses")
+
+
+def record_cacheops_read(sender, func, hit, **kwargs):
+    """Receiver for cacheops.signals.cache_read."""
+    record_read(hit)
+
+
+def hit_rate():
+    hits = metrics.get("query_cache.hits")
+    total = hits + metrics.get("query_cache.misses")
+    return hits / total if total else None
@@ -0,0 +1,50 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def _validators(request, version, last_modified):
+    raw = repr((request.get_full_path(), version))
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    return etag, timestamp
+
+
+def _set_validators(response, etag, timestamp):
+    response["ETag"] = etag
+    if timestamp is not None:
+        response["Last-Modified"] = http_date(timestamp)
+    # The validators are computed for request.user
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def conditional_get(request, version, last_modified, respond):
+    """
+    Answers a GET with 304 Not Modified when the client's copy is current.
+
+    ``version`` is any cheap value that changes whenever the response body
+    would, e.g. the row count and max updated_at of a queryset. It is
+    hashed together with the full path, so every page gets its own ETag.
+    ``respond`` builds the full response and is only called when needed.
+    """
+    etag, timestamp = _validators(request, version, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = respond()
+    return _set_validators(response, etag, timestamp)
+
+
+async def aconditional_get(request, version, last_modified, respond):
+    """conditional_get() for async views; ``respond`` is a coroutine."""
+    etag, timestamp = _validators(request, version, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = await respond()
+    return _set_validators(response, etag, timestamp)
@@ -0,0 +1,137 @@
+"""
+In-process database connection pool.
+
+One pool per database alias and process, shared by all threads: the
+request threads of gunicorn and of uvicorn (where Django runs the ORM in
+sync_to_async threads), and background task threads. A connection is
+checked out when Django connects and returned when Django closes it,
+e.g. at the end of a request. Pools are created lazily and dropped after
+a fork, so gunicorn workers never share connections with the master.
+
+Counters and gauges are reported under db_pool.* in apps/common/metrics.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from apps.common import metrics
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    At most max_size connections, opened by factory() on demand.
+    getconn() waits up to timeout seconds for a free slot.
+    """
+
+    def __init__(self, alias, max_size, timeout):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._in_use = 0
+
+    def getconn(self, factory, check=None):
+        """
+        A connection from the pool, or a new one from factory().
+        check(connection) returns whether an idle connection still works.
+        """
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            metrics.increment("db_pool.timeouts")
+            raise PoolTimeout(
+                f"No connection to {self.alias!r} free "
+                f"within {self.timeout} seconds"
+            )
+        metrics.increment("db_pool.checkouts")
+        metrics.increment(
+            "db_pool.wait_ms", (time.perf_counter() - start) * 1000
+        )
+        try:
+            connection = self._take_idle(check)
+            if connection is None:
+                connection = factory()
+                metrics.increment("db_pool.connections_opened")
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        return connection
+
+    def putconn(self, connection):
+        """Returns a connection; one that cannot be reused is closed."""
+        try:
+            if self._reusable(connection):
+                with self._lock:
+                    self._idle.append(connection)
+            else:
+                self._discard(connection)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {"in_use": self._in_use, "idle": len(self._idle)}
+
+    def _take_idle(self, check):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+            if not connection.closed and (check is None or check(connection)):
+                return connection
+            self._discard(connection)
+
+    def _reusable(self, connection):
+        if connection.closed:
+            return False
+        try:
+            # Django closes connections without rolling back, e.g. after
+            # an error inside atomic()
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        metrics.increment("db_pool.connections_closed")
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def get_pool(alias, max_size, timeout):
+    """The pool of this process for the database alias."""
+    key = (os.getpid(), alias)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(alias, max_size, timeout)
+                # Forget pools inherited from a parent process; their
+                # connections belong to the parent
+                for other in [k for k in _pools if k[0] != key[0]]:
+                    del _pools[other]
+                _pools[key] = pool
+                for name in ("in_use", "idle"):
+                    metrics.register_gauge(
+                        f"db_pool.{alias}.{name}",
+                        lambda pool=pool, name=name: pool.stats()[name],
+                    )
+    return pool
@@ -0,0 +1,65 @@
+"""
+PostgreSQL backend that takes its connections from the in-process pool
+in apps/common/db/pool.py. Enabled by setting POOL_SIZE on a database
+(DB_POOL_SIZE in the settings); without it, it behaves exactly like
+Django's own backend.
+"""
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from apps.common.db.pool import PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        size = self.settings_dict.get("POOL_SIZE") or 0
+        if size <= 0:
+            return None
+        return get_pool(
+            self.alias, size, self.settings_dict.get("POOL_TIMEOUT", 10)
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        try:
+            connection = pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params
+                ),
+                check=(
+                    self._check_pooled
+                    if self.settings_dict["CONN_HEALTH_CHECKS"]
+                    else None
+                ),
+            )
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        # Set by get_new_connection() when the connection was opened
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None:
+            return super()._close()
+        if self.connection is not None:
+            pool.putconn(self.connection)
+
+    @staticmethod
+    def _check_pooled(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            # End the transaction the check opened without autocommit
+            connection.rollback()
+        except base.Database.Error:
+            return False
+        return True
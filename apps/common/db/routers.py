@@ -0,0 +1,82 @@
+"""
+Read-replica routing.
+
+Reads go to the primary ("default") unless a view opts in with
+set_replica_reads(), which ReplicaReadMixin in apps/common/views.py does
+for the read actions of the prayer and group endpoints. A user who writes is
+pinned to the primary for DB_REPLICA_PIN_SECONDS, so they read their own
+writes even while the replicas lag behind; within a request, any write
+switches the remaining reads back to the primary, and reads inside an
+atomic() block always use the primary. The pins live in
+Django's cache, so set CACHE_REDIS when running several processes.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from apps.common import metrics
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def _pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def replicas():
+    """The aliases of the configured replicas."""
+    return [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if alias in connections.settings
+    ]
+
+
+def pin_to_primary(user_id):
+    """Sends the user's reads to the primary for a while."""
+    if replicas():
+        cache.set(_pin_key(user_id), True, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(_pin_key(user_id), False)
+
+
+def set_replica_reads(enabled):
+    """Lets reads of the current request or task go to a replica."""
+    _replica_reads.set(enabled)
+
+
+class ReplicaRouter:
+    """
+    Routes reads to a random replica where replica reads are enabled,
+    everything else to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        # The transaction's reads must see its own (uncommitted) writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        aliases = replicas()
+        if not aliases:
+            return None
+        metrics.increment("db.replica_reads")
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        # Read your own write for the rest of the request
+        _replica_reads.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -0,0 +1,103 @@
+import io
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from apps.common.parsers import FastJSONParser
+from apps.common.renderers import FastJSONRenderer
+
+
+def edge_cases():
+    """Values that orjson does not encode the way JSONRenderer does."""
+    now = timezone.now()
+    return {
+        "datetime": now,
+        "naive": now.replace(tzinfo=None),
+        "date": now.date(),
+        "time": now.time(),
+        "duration": timedelta(minutes=5),
+        "decimal": Decimal("1.10"),
+        "lazy": _("Group Only"),
+        "separator": "a\u2028b",
+        "big_integer": 2**70,
+        1: "integer key",
+    }
+
+
+def sample_page(items):
+    """A prayer list page shaped like PrayerSerializer output."""
+    now = timezone.now()
+    return ReturnList(
+        [
+            {
+                "id": i,
+                "title": f"Prayer request {i}",
+                "content": "Please pray for my family. " * 20,
+                "author": i % 50,
+                "author_name": "Anonymous" if i % 7 == 0 else "Ana Novak",
+                "category": 3,
+                "category_name": "Health",
+                "status": "active",
+                "privacy_level": "public",
+                "group": None,
+                "prayer_count": i * 3,
+                "is_anonymous": i % 7 == 0,
+                "created_at": (now - timedelta(minutes=i)).isoformat(),
+                "updated_at": (now - timedelta(minutes=i)).isoformat(),
+            }
+            for i in range(items)
+        ],
+        serializer=None,
+    )
+
+
+class Command(BaseCommand):
+    help = "Compare the JSON renderers and parsers on a prayer list page."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        data = sample_page(options["items"])
+        repeat = options["repeat"]
+
+        for sample in [data, edge_cases()]:
+            expected = JSONRenderer().render(sample)
+            if FastJSONRenderer().render(sample) != expected:
+                self.stderr.write(f"Output differs from {expected[:200]}")
+        baseline = JSONRenderer().render(data)
+
+        for name, renderer in [
+            ("JSONRenderer", JSONRenderer()),
+            ("FastJSONRenderer", FastJSONRenderer()),
+        ]:
+            elapsed = self.time(lambda: renderer.render(data), repeat)
+            self.report(name, elapsed, repeat, len(baseline))
+
+        for name, parser in [
+            ("JSONParser", JSONParser()),
+            ("FastJSONParser", FastJSONParser()),
+        ]:
+            elapsed = self.time(
+                lambda: parser.parse(io.BytesIO(baseline)), repeat
+            )
+            self.report(name, elapsed, repeat, len(baseline))
+
+    def time(self, func, repeat):
+        start = time.perf_counter()
+        for _i in range(repeat):
+            func()
+        return time.perf_counter() - start
+
+    def report(self, name, elapsed, repeat, size):
+        per_call = elapsed / repeat * 1000
+        rate = size * repeat / elapsed / 1024 / 1024
+        self.stdout.write(f"{name:<18} {per_call:8.2f} ms  {rate:8.1f} MB/s")
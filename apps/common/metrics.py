@@ -0,0 +1,32 @@
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_gauges = {}
+
+
+def increment(name, value=1):
+    """Increments a per-process counter."""
+    with _lock:
+        _counters[name] += value
+
+
+def get(name):
+    """Returns the current value of a counter."""
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def register_gauge(name, func):
+    """Registers a callable that is evaluated on every snapshot."""
+    _gauges[name] = func
+
+
+def snapshot():
+    """Returns the current value of every counter and gauge."""
+    with _lock:
+        values = dict(_counters)
+    for name, func in _gauges.items():
+        values[name] = func()
+    return values
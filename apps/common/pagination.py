@@ -0,0 +1,69 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class _FetchPage(Exception):
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+
+class _PrefetchedPage:
+    """
+    Stands in for the queryset in CursorPagination.paginate_queryset():
+    order_by() and filter() are applied to the wrapped queryset, and the
+    slice DRF reads the page from is answered with rows fetched ahead.
+    Without rows, slicing raises _FetchPage with the queryset to fetch.
+    """
+
+    def __init__(self, queryset, rows=None):
+        self.queryset = queryset
+        self.rows = rows
+
+    def order_by(self, *fields):
+        return _PrefetchedPage(self.queryset.order_by(*fields), self.rows)
+
+    def filter(self, *args, **kwargs):
+        return _PrefetchedPage(
+            self.queryset.filter(*args, **kwargs), self.rows
+        )
+
+    def __getitem__(self, key):
+        if self.rows is None:
+            raise _FetchPage(self.queryset[key])
+        return self.rows
+
+
+class PrayerCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the prayer feed.
+    The cursor encodes the position on (-created_at, id), so every page
+    is a range scan on the matching index no matter how deep it is.
+    """
+
+    ordering = ("-created_at", "id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views. DRF's cursor logic runs
+        twice: first to find the page query, which is then fetched with
+        aiterator(), and again on the fetched rows.
+        """
+        try:
+            return self.paginate_queryset(
+                _PrefetchedPage(queryset), request, view
+            )
+        except _FetchPage as fetch:
+            rows = [row async for row in fetch.queryset.aiterator()]
+        return self.paginate_queryset(
+            _PrefetchedPage(queryset, rows), request, view
+        )
+
+
+class PrayerSearchPagination(PageNumberPagination):
+    """Pages of ranked search results, which have no stable cursor."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,49 @@
+from django.core.exceptions import FieldDoesNotExist
+
+
+def optimize_for_serializer(queryset, serializer_class, field_names=None):
+    """
+    Applies select_related() and only() for the given serializer, or for
+    the subset of its fields given in field_names (see
+    apps.common.serializers.selected_fields).
+
+    A serializer declares the relations it reads in
+    ``select_related_fields``, mapping each relation to the columns it
+    needs from it, e.g. ``{"author": ["email"]}``, and what its
+    serializer-only fields read in ``field_columns``, e.g.
+    ``{"author_name": ["is_anonymous", "author"]}``, where a relation
+    name means the relation is joined. Any other field is loaded from
+    the model field of the same name.
+    """
+    related = getattr(serializer_class, "select_related_fields", None)
+    if not related:
+        return queryset
+    field_columns = getattr(serializer_class, "field_columns", {})
+    if field_names is None:
+        field_names = serializer_class.Meta.fields
+
+    opts = queryset.model._meta
+    columns = []
+    relations = []
+    for name in field_names:
+        if name in field_columns:
+            for column in field_columns[name]:
+                if column in related:
+                    relations.append(column)
+                else:
+                    columns.append(column)
+            continue
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            # Serializer-only field, e.g. a SerializerMethodField
+            continue
+        if field.concrete:
+            columns.append(field.attname)
+
+    relations = list(dict.fromkeys(relations))
+    for relation in relations:
+        columns.append(relation)
+        columns.extend(f"{relation}__{field}" for field in related[relation])
+
+    return queryset.select_related(*relations).only(*columns)
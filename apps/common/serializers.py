@@ -0,0 +1,32 @@
+def _names(request, param):
+    value = request.query_params.get(param, "")
+    return {name.strip() for name in value.split(",") if name.strip()}
+
+
+def selected_fields(request, field_names):
+    """
+    The field_names asked for with ?fields=a,b and/or ?omit=c on a GET
+    request, in their original order. Unknown names are ignored.
+    Other requests always get every field.
+    """
+    if request is None or request.method != "GET":
+        return list(field_names)
+    fields = _names(request, "fields")
+    omit = _names(request, "omit")
+    return [
+        name
+        for name in field_names
+        if (not fields or name in fields) and name not in omit
+    ]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for sparse fieldsets: on GET requests only the
+    fields selected with ?fields= / ?omit= are rendered.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        names = selected_fields(self.context.get("request"), fields)
+        return {name: fields[name] for name in names}
@@ -0,0 +1,47 @@
+"""
+Minimal background worker for work that should not block a request.
+
+Jobs run on an in-process thread pool once the current transaction has
+committed. With BACKGROUND_TASKS_EAGER they run inline instead, which
+keeps local development and tests deterministic.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix="background-task",
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", func.__qualname__)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Runs func(*args, **kwargs) after the current transaction commits."""
+    if settings.BACKGROUND_TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+    transaction.on_commit(
+        lambda: _get_executor().submit(_run, func, args, kwargs)
+    )
@@ -1,3 +1,309 @@
-from django.test import TestCase  # noqa: F401
+import json
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.prayer.models import (
+    Group,
+    Prayer,
+    PrayerCategory,
+    PrayerTombstone,
+)
+from apps.users.models import User
+
+from . import cache as query_cache
+from . import metrics
+from .db import pool, routers
+from .renderers import FastJSONRenderer
+
+
+@override_settings(QUERY_CACHE_ENABLED=True)
+class QueryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def version(self, model):
+        return cache.get(query_cache._version_key(model), 0)
+
+    def test_configured_models_are_tracked_at_startup(self):
+        self.assertIn(PrayerCategory, query_cache._tracked_models)
+        self.assertIn(Group, query_cache._tracked_models)
+        self.assertNotIn(PrayerTombstone, query_cache._tracked_models)
+
+    def test_changes_bump_the_version_without_cached_calls(self):
+        category = PrayerCategory.objects.create(name="Health")
+        self.assertEqual(self.version(PrayerCategory), 1)
+        category.delete()
+        self.assertEqual(self.version(PrayerCategory), 2)
+
+    def test_cached_results_are_invalidated(self):
+        calls = []
+
+        @query_cache.cached_as(PrayerCategory)
+        def names():
+            calls.append(1)
+            return list(PrayerCategory.objects.values_list("name", flat=True))
+
+        self.assertEqual(names(), [])
+        self.assertEqual(names(), [])
+        PrayerCategory.objects.create(name="Health")
+        self.assertEqual(names(), ["Health"])
+        self.assertEqual(len(calls), 2)
+
+    def test_untracked_models_cannot_be_cached(self):
+        with self.assertRaises(ImproperlyConfigured):
+            query_cache.cached_as(PrayerTombstone)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assert_renders_like_json_renderer(self, data):
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_same_bytes_as_json_renderer(self):
+        self.assert_renders_like_json_renderer(
+            {"decimal": Decimal("1.10"), "separator": "a\u2028b", 1: "key"}
+        )
+
+    def test_integers_beyond_64_bits_fall_back(self):
+        self.assert_renders_like_json_renderer({"count": 2**70})
+
+    def test_floats_have_the_same_value(self):
+        data = {"small": 1e-7, "large": 1e16}
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+
+class FakeConnection:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.closed = False
+
+    def rollback(self):
+        if self.broken:
+            raise OSError("connection lost")
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = pool.ConnectionPool("pool-test", max_size=2, timeout=0.01)
+        self.opened = []
+        self.counters = metrics.snapshot()
+
+    def factory(self, broken=False):
+        connection = FakeConnection(broken)
+        self.opened.append(connection)
+        return connection
+
+    def counted(self, name):
+        """Increase of the db_pool.<name> counter during the test."""
+        name = f"db_pool.{name}"
+        return metrics.get(name) - self.counters.get(name, 0)
+
+    def test_returned_connections_are_reused(self):
+        first = self.pool.getconn(self.factory)
+        self.pool.putconn(first)
+        self.assertIs(self.pool.getconn(self.factory), first)
+        self.assertEqual(self.opened, [first])
+        self.assertEqual(self.counted("checkouts"), 2)
+        self.assertEqual(self.counted("connections_opened"), 1)
+        self.assertEqual(self.pool.stats(), {"in_use": 1, "idle": 0})
+
+    def test_broken_connections_are_discarded(self):
+        broken = self.pool.getconn(lambda: self.factory(broken=True))
+        self.pool.putconn(broken)
+        self.assertTrue(broken.closed)
+        self.assertEqual(self.pool.stats(), {"in_use": 0, "idle": 0})
+
+        closed = self.pool.getconn(self.factory)
+        closed.close()
+        self.pool.putconn(closed)
+        self.assertEqual(self.counted("connections_closed"), 2)
+        self.assertIsNot(self.pool.getconn(self.factory), closed)
+
+    def test_idle_connections_failing_the_check_are_discarded(self):
+        stale = self.pool.getconn(self.factory)
+        self.pool.putconn(stale)
+        fresh = self.pool.getconn(self.factory, check=lambda conn: False)
+        self.assertIsNot(fresh, stale)
+        self.assertTrue(stale.closed)
+        self.assertEqual(self.counted("connections_closed"), 1)
+
+    def test_checkout_times_out_when_the_pool_is_exhausted(self):
+        held = [self.pool.getconn(self.factory) for _i in range(2)]
+        with self.assertRaises(pool.PoolTimeout):
+            self.pool.getconn(self.factory)
+        self.assertEqual(self.counted("timeouts"), 1)
+        self.assertEqual(len(self.opened), 2)
+
+        self.pool.putconn(held[0])
+        self.assertIs(self.pool.getconn(self.factory), held[0])
+        self.assertGreater(self.counted("wait_ms"), 0)
+
+    def test_failed_connects_free_their_slot(self):
+        def refuse():
+            raise OSError("connection refused")
+
+        for _i in range(3):
+            with self.assertRaises(OSError):
+                self.pool.getconn(refuse)
+        self.pool.getconn(self.factory)
+        self.assertEqual(self.pool.stats(), {"in_use": 1, "idle": 0})
+
+    def test_backend_raises_operational_error_on_timeout(self):
+        from .db.postgresql.base import DatabaseWrapper
+
+        wrapper = DatabaseWrapper(
+            {
+                "ENGINE": "apps.common.db.postgresql",
+                "NAME": "pool-test",
+                "POOL_SIZE": 1,
+                "POOL_TIMEOUT": 0.01,
+                "CONN_HEALTH_CHECKS": False,
+                "OPTIONS": {},
+            },
+            "pool-timeout-test",
+        )
+        wrapper.pool.getconn(self.factory)
+        with self.assertRaises(OperationalError):
+            with wrapper.wrap_database_errors:
+                wrapper.get_new_connection({})
+        self.assertEqual(self.counted("timeouts"), 1)
+
+    def test_pool_gauges_are_reported(self):
+        self.pool = pool.get_pool("pool-gauge-test", 2, 0.01)
+        self.pool.getconn(self.factory)
+        self.pool.putconn(self.pool.getconn(self.factory))
+        values = metrics.snapshot()
+        self.assertEqual(values["db_pool.pool-gauge-test.in_use"], 1)
+        self.assertEqual(values["db_pool.pool-gauge-test.idle"], 1)
+        self.assertIs(pool.get_pool("pool-gauge-test", 2, 0.01), self.pool)
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        patcher = mock.patch.object(
+            routers, "replicas", return_value=["replica1"]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(routers.set_replica_reads, False)
+
+    def test_reads_go_to_the_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Prayer))
+
+    def test_replica_reads_go_to_a_replica(self):
+        routers.set_replica_reads(True)
+        self.assertEqual(self.router.db_for_read(Prayer), "replica1")
+
+    def test_writes_go_to_the_primary_and_end_replica_reads(self):
+        routers.set_replica_reads(True)
+        self.assertEqual(self.router.db_for_write(Prayer), "default")
+        self.assertIsNone(self.router.db_for_read(Prayer))
+
+    def test_reads_in_atomic_blocks_go_to_the_primary(self):
+        routers.set_replica_reads(True)
+        with transaction.atomic():
+            self.assertIsNone(self.router.db_for_read(Prayer))
+        self.assertEqual(self.router.db_for_read(Prayer), "replica1")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaPinTests(TransactionTestCase):
+    url = "/api/v1/prayers/"
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A real second database, which only sees the primary's rows when
+        # replicate() copies them over, i.e. a replica that lags behind.
+        # Added after setUpClass(), which only lets a test use the
+        # databases the test runner created.
+        databases = connections.configure_settings(
+            {
+                **connections.settings,
+                "replica1": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": ":memory:",
+                },
+            }
+        )
+        connections.settings["replica1"] = databases["replica1"]
+
+    @classmethod
+    def tearDownClass(cls):
+        del connections["replica1"]
+        del connections.settings["replica1"]
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="user@example.com", password=None
+        )
+        self.replicate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def replicate(self):
+        primary, replica = connections["default"], connections["replica1"]
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    def feed(self):
+        before = metrics.get("db.replica_reads")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        titles = [prayer["title"] for prayer in response.json()["results"]]
+        return titles, metrics.get("db.replica_reads") - before
+
+    def test_reads_see_the_replica_until_it_catches_up(self):
+        Prayer.objects.create(
+            title="Prayer", content="Please pray.", author=self.user
+        )
+        titles, replica_reads = self.feed()
+        self.assertEqual(titles, [])
+        self.assertGreater(replica_reads, 0)
+
+        self.replicate()
+        self.assertEqual(self.feed()[0], ["Prayer"])
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        response = self.client.post(
+            self.url, {"title": "Prayer", "content": "Please pray."}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(routers.is_pinned(self.user.pk))
+        self.assertEqual(self.feed(), (["Prayer"], 0))
+
+        cache.delete(routers._pin_key(self.user.pk))
+        titles, replica_reads = self.feed()
+        self.assertEqual(titles, [])
+        self.assertGreater(replica_reads, 0)
+
+    def test_pinning_reads_the_primary(self):
+        Prayer.objects.create(
+            title="Prayer", content="Please pray.", author=self.user
+        )
+        self.assertEqual(self.feed()[0], [])
+        routers.pin_to_primary(self.user.pk)
+        self.assertEqual(self.feed(), (["Prayer"], 0))
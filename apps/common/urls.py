@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import MetricsView
+
+app_name = "common"
+
+urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+]
@@ -1,3 +1,112 @@
-from django.shortcuts import render  # noqa: F401
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import SynchronousOnlyOperation
+from django.utils.decorators import classonlymethod
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from . import metrics
+from .db import routers
+
+
+class AsyncViewSetMixin:
+    """
+    Async dispatch for viewsets served under ASGI (ASYNC_VIEWS_ENABLED).
+
+    An action with an async variant named after it with an "a" prefix,
+    e.g. ``async def alist()``, runs on the event loop and uses the async
+    ORM. Every other action is handled in a thread, as Django runs sync
+    views under ASGI. With ASYNC_VIEWS_ENABLED off (WSGI) the viewset is
+    an ordinary sync view and the async variants are not used.
+    """
+
+    async_dispatch = False
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        initkwargs.setdefault("async_dispatch", settings.ASYNC_VIEWS_ENABLED)
+        view = super().as_view(actions, **initkwargs)
+        if initkwargs["async_dispatch"]:
+            markcoroutinefunction(view)
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.async_dispatch:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        action = self.action_map.get(request.method.lower())
+        handler = getattr(self, f"a{action}", None) if action else None
+        if handler is None:
+            return await sync_to_async(super().dispatch)(
+                request, *args, **kwargs
+            )
+
+        # As APIView.dispatch(), awaiting the handler
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            try:
+                self.initial(request, *args, **kwargs)
+            except SynchronousOnlyOperation:
+                # Authentication read the user row, which
+                # StatelessJWTAuthentication only does for tokens
+                # issued without claims
+                await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+
+class ReplicaReadMixin:
+    """
+    Serves replica_actions from a read replica (apps/common/db/routers.py)
+    unless the user wrote recently; successful writes through the viewset
+    pin the user to the primary.
+    """
+
+    replica_actions = ("list", "retrieve")
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        routers.set_replica_reads(
+            self.action in self.replica_actions
+            and request.method in permissions.SAFE_METHODS
+            and bool(routers.replicas())
+            and not (
+                request.user.is_authenticated
+                and routers.is_pinned(request.user.pk)
+            )
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # The context of a WSGI thread outlives the request
+        routers.set_replica_reads(False)
+        if (
+            request.method not in permissions.SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            routers.pin_to_primary(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class MetricsView(APIView):
+    """
+    Per-process counters and gauges (query cache hit rate, etc.).
+    Only available to site administrators.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
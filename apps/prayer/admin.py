@@ -6,6 +6,7 @@ from .models import (
     GroupMembership,
     MembershipRequest,
 )
+from .search import search_prayers
 
 
 @admin.register(Prayer)
@@ -22,6 +23,12 @@ class PrayerAdmin(admin.ModelAdmin):
     search_fields = ["title", "content"]
     date_hierarchy = "created_at"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Uses the full-text index instead of ILIKE over every row."""
+        if not search_term:
+            return queryset, False
+        return search_prayers(queryset, search_term), False
+
 
 @admin.register(PrayerCategory)
 class PrayerCategoryAdmin(admin.ModelAdmin):
@@ -0,0 +1,119 @@
+import random
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce, Now
+
+from .models import Prayer, PrayerCountShard
+
+FLUSH_BATCH_SIZE = 500
+
+
+def increment_prayer_count(prayer_id):
+    """
+    Records one prayer for the given prayer id.
+    The increment is an atomic UPDATE ... SET count = count + 1 on a
+    randomly chosen shard, so no increments are lost and Prayer itself
+    (including updated_at) is not rewritten.
+    """
+    shard = random.randrange(settings.PRAYER_COUNT_SHARDS)
+    shards = PrayerCountShard.objects.filter(prayer_id=prayer_id, shard=shard)
+    if shards.update(count=F("count") + 1, updated_at=Now()):
+        return
+    try:
+        with transaction.atomic():
+            PrayerCountShard.objects.create(
+                prayer_id=prayer_id, shard=shard, count=1
+            )
+    except IntegrityError:
+        # Another request created the shard first
+        shards.update(count=F("count") + 1, updated_at=Now())
+
+
+async def aincrement_prayer_count(prayer_id):
+    """increment_prayer_count() with the async ORM."""
+    shard = random.randrange(settings.PRAYER_COUNT_SHARDS)
+    shards = PrayerCountShard.objects.filter(prayer_id=prayer_id, shard=shard)
+    if await shards.aupdate(count=F("count") + 1, updated_at=Now()):
+        return
+    try:
+        # Async views run in autocommit, so a failed insert needs no
+        # savepoint
+        await PrayerCountShard.objects.acreate(
+            prayer_id=prayer_id, shard=shard, count=1
+        )
+    except IntegrityError:
+        await shards.aupdate(count=F("count") + 1, updated_at=Now())
+
+
+def with_prayer_counts(queryset):
+    """
+    Annotates pending_prayer_count (sum of the shards) on a Prayer queryset,
+    so Prayer.total_prayer_count does not need a query per row.
+    """
+    pending = (
+        PrayerCountShard.objects.filter(prayer=OuterRef("pk"))
+        .order_by()
+        .values("prayer")
+        .annotate(total=Sum("count"))
+        .values("total")
+    )
+    return queryset.annotate(
+        pending_prayer_count=Coalesce(Subquery(pending), 0)
+    )
+
+
+def flush_prayer_counts():
+    """
+    Folds the shard counts into Prayer.prayer_count.
+    Prayers are flushed FLUSH_BATCH_SIZE at a time, each batch in its own
+    short transaction with one UPDATE for its shards and one for its
+    prayers. Shard rows are locked while they are folded, and the folded
+    amount is subtracted rather than reset, so taps that arrive meanwhile
+    are kept.
+    Returns the number of prayers updated.
+    """
+    prayer_ids = list(
+        PrayerCountShard.objects.filter(count__gt=0)
+        .order_by("prayer_id")
+        .values_list("prayer_id", flat=True)
+        .distinct()
+    )
+    return sum(
+        _flush_batch(prayer_ids[start : start + FLUSH_BATCH_SIZE])
+        for start in range(0, len(prayer_ids), FLUSH_BATCH_SIZE)
+    )
+
+
+def _flush_batch(prayer_ids):
+    with transaction.atomic():
+        shards = list(
+            PrayerCountShard.objects.select_for_update()
+            .filter(prayer_id__in=prayer_ids, count__gt=0)
+            .values_list("pk", "prayer_id", "count")
+        )
+        if not shards:
+            return 0
+        totals = defaultdict(int)
+        for _pk, prayer_id, count in shards:
+            totals[prayer_id] += count
+        PrayerCountShard.objects.filter(
+            pk__in=[pk for pk, _prayer_id, _count in shards]
+        ).update(
+            count=F("count")
+            - Case(
+                *(When(pk=pk, then=count) for pk, _prayer_id, count in shards)
+            )
+        )
+        Prayer.objects.filter(pk__in=totals).update(
+            prayer_count=F("prayer_count")
+            + Case(
+                *(
+                    When(pk=prayer_id, then=total)
+                    for prayer_id, total in totals.items()
+                )
+            )
+        )
+    return len(totals)
@@ -0,0 +1,107 @@
+"""
+Materialized home feed (fan-out-on-write) for group prayers.
+
+When FEED_MATERIALIZATION_ENABLED is on, a new group-level prayer is
+copied into a FeedEntry row for every member of its group by a
+background task, so a user's group prayers are one range scan on
+(user, -created_at). Groups with more than FEED_FANOUT_MAX_MEMBERS
+members are flagged fanout_on_read and keep being read from the group
+(see apps/prayer/visibility.py).
+"""
+
+from itertools import islice
+
+from django.conf import settings
+
+from apps.common.cache import invalidate_obj
+from apps.common.tasks import run_in_background
+
+from .models import FeedEntry, Group, GroupMembership, Prayer
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def fans_out_on_write(group):
+    """
+    Whether prayers of this group are materialized into timelines.
+    A group that grows too large is switched to fan-out-on-read for good,
+    since its older prayers were never fanned out.
+    """
+    if group.fanout_on_read:
+        return False
+    if group.member_count > settings.FEED_FANOUT_MAX_MEMBERS:
+        Group.objects.filter(pk=group.pk).update(fanout_on_read=True)
+        group.fanout_on_read = True
+        invalidate_obj(group)
+        return False
+    return True
+
+
+def schedule_fan_out(prayer):
+    """Queues the fan-out of a group prayer to the group's members."""
+    if not settings.FEED_MATERIALIZATION_ENABLED:
+        return
+    if prayer.privacy_level != Prayer.PrivacyLevel.GROUP or not prayer.group:
+        return
+    if fans_out_on_write(prayer.group):
+        run_in_background(fan_out_prayer, prayer.pk)
+
+
+def schedule_member_backfill(membership):
+    """Queues copying a group's prayers into a new member's timeline."""
+    if not settings.FEED_MATERIALIZATION_ENABLED:
+        return
+    if not membership.group.fanout_on_read:
+        run_in_background(
+            backfill_member, membership.user_id, membership.group_id
+        )
+
+
+def fan_out_prayer(prayer_id):
+    prayer = Prayer.objects.filter(
+        pk=prayer_id, privacy_level=Prayer.PrivacyLevel.GROUP
+    ).first()
+    if prayer is None or prayer.group_id is None:
+        return
+    member_ids = GroupMembership.objects.filter(
+        group_id=prayer.group_id
+    ).values_list("user_id", flat=True)
+    _insert_entries(
+        FeedEntry(
+            user_id=user_id,
+            prayer_id=prayer.pk,
+            group_id=prayer.group_id,
+            created_at=prayer.created_at,
+        )
+        for user_id in member_ids.iterator()
+    )
+
+
+def backfill_member(user_id, group_id):
+    prayers = Prayer.objects.filter(
+        group_id=group_id, privacy_level=Prayer.PrivacyLevel.GROUP
+    ).values_list("pk", "created_at")
+    _insert_entries(
+        FeedEntry(
+            user_id=user_id,
+            prayer_id=prayer_id,
+            group_id=group_id,
+            created_at=created_at,
+        )
+        for prayer_id, created_at in prayers.iterator()
+    )
+
+
+def remove_member(user_id, group_id):
+    FeedEntry.objects.filter(user_id=user_id, group_id=group_id).delete()
+
+
+def remove_prayer(prayer_id):
+    """Drops a prayer from every timeline, e.g. when it changes group."""
+    FeedEntry.objects.filter(prayer_id=prayer_id).delete()
+
+
+def _insert_entries(entries):
+    """Inserts FeedEntry rows in batches, skipping existing ones."""
+    while batch := list(islice(entries, FANOUT_BATCH_SIZE)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
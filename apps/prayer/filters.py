@@ -0,0 +1,64 @@
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Prayer
+
+
+class PrayerFilterSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(
+        choices=Prayer.Status.choices, required=False
+    )
+    privacy_level = serializers.ChoiceField(
+        choices=Prayer.PrivacyLevel.choices, required=False
+    )
+    category = serializers.IntegerField(required=False)
+    group = serializers.IntegerField(required=False)
+    author = serializers.IntegerField(required=False)
+    is_anonymous = serializers.BooleanField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+# Query parameter -> lookup
+PRAYER_FILTERS = {
+    "status": "status",
+    "privacy_level": "privacy_level",
+    "category": "category_id",
+    "group": "group_id",
+    "author": "author_id",
+    "is_anonymous": "is_anonymous",
+    "created_after": "created_at__gte",
+    "created_before": "created_at__lt",
+}
+
+
+class PrayerFilterBackend(BaseFilterBackend):
+    """
+    Filters prayers by the query parameters in PRAYER_FILTERS, e.g.
+    ?status=active&group=3&created_after=2025-01-01.
+    The common combinations with the feed order have composite indexes
+    on Prayer.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        # A plain dict, so a missing is_anonymous is not read as False
+        params = PrayerFilterSerializer(data=request.query_params.dict())
+        params.is_valid(raise_exception=True)
+        lookups = {
+            PRAYER_FILTERS[name]: value
+            for name, value in params.validated_data.items()
+        }
+        if not lookups:
+            return queryset
+        return queryset.filter(**lookups)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "schema": {"type": "string"},
+            }
+            for name in PRAYER_FILTERS
+        ]
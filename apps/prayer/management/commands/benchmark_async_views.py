@@ -0,0 +1,183 @@
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.routers import DefaultRouter
+
+from apps.prayer.models import Group, GroupMembership, Prayer
+from apps.prayer.views import GroupViewSet, PrayerViewSet
+from apps.users.models import User
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+EMAIL = "benchmark-async@example.com"
+
+# Server setups: (name, handler, async views)
+MODES = [
+    ("WSGI", "wsgi", False),
+    ("ASGI, sync views", "asgi", False),
+    ("ASGI, async views", "asgi", True),
+]
+
+
+def urlconf(async_views):
+    """The prayer and group routes, built with or without async views."""
+    with override_settings(ASYNC_VIEWS_ENABLED=async_views):
+        router = DefaultRouter()
+        router.register(r"prayers", PrayerViewSet, basename="prayer")
+        router.register(r"groups", GroupViewSet, basename="group")
+        return type("URLConf", (), {"urlpatterns": router.urls})
+
+
+def create_sample(prayers):
+    user = User.objects.create_user(email=EMAIL, password=None)
+    group = Group.objects.create(name="Benchmark", created_by=user)
+    GroupMembership.objects.create(
+        user=user, group=group, role=GroupMembership.Role.ADMIN
+    )
+    Prayer.objects.bulk_create(
+        Prayer(title=f"Prayer {i}", content="Please pray.", author=user)
+        for i in range(prayers)
+    )
+    return user
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the prayer feed, the group list and "
+        "'pray' under WSGI (a thread pool, as gunicorn's gthread workers) "
+        "and ASGI (one event loop, as uvicorn) with sync and async views. "
+        "Requests go through the full middleware stack in process, without "
+        "a network. Sample data is created and deleted again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=16,
+            help="Requests in flight; WSGI threads for the WSGI run.",
+        )
+        parser.add_argument("--prayers", type=int, default=200)
+
+    def handle(self, *args, **options):
+        User.objects.filter(email=EMAIL).delete()
+        user = create_sample(options["prayers"])
+        try:
+            token = ClaimsTokenObtainPairSerializer.get_token(user)
+            headers = {"Authorization": f"Bearer {token.access_token}"}
+            prayer_id = Prayer.objects.filter(author=user).first().pk
+            endpoints = [
+                ("feed", "GET", "/prayers/"),
+                ("groups", "GET", "/groups/"),
+                ("pray", "POST", f"/prayers/{prayer_id}/pray/"),
+            ]
+            for name, server, async_views in MODES:
+                with override_settings(
+                    ROOT_URLCONF=urlconf(async_views),
+                    ALLOWED_HOSTS=["testserver"],
+                ):
+                    for endpoint, method, path in endpoints:
+                        self.run(
+                            f"{name}: {endpoint}",
+                            server,
+                            method,
+                            path,
+                            headers,
+                            options,
+                        )
+        finally:
+            Group.objects.filter(created_by=user).delete()
+            user.delete()
+
+    def run(self, label, server, method, path, headers, options):
+        requests = options["requests"]
+        start = time.perf_counter()
+        if server == "wsgi":
+            statuses = self.run_wsgi(method, path, headers, options)
+        else:
+            statuses = asyncio.run(
+                self.run_asgi(method, path, headers, options)
+            )
+        elapsed = time.perf_counter() - start
+        errors = sum(1 for status in statuses if status >= 400)
+        self.stdout.write(
+            f"{label:<28} {requests / elapsed:8.1f} req/s  {errors} errors"
+        )
+
+    def run_wsgi(self, method, path, headers, options):
+        handler = WSGIHandler()
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": "",
+            "SERVER_NAME": "testserver",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": "testserver",
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+            **{
+                "HTTP_" + name.upper().replace("-", "_"): value
+                for name, value in headers.items()
+            },
+        }
+
+        def request(_i):
+            statuses = []
+            response = handler(
+                {**environ, "wsgi.input": io.BytesIO()},
+                lambda status, response_headers: statuses.append(status),
+            )
+            b"".join(response)
+            response.close()
+            return int(statuses[0].split()[0])
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            return list(pool.map(request, range(options["requests"])))
+
+    async def run_asgi(self, method, path, headers, options):
+        handler = ASGIHandler()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"testserver")]
+            + [
+                (name.lower().encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        in_flight = asyncio.Semaphore(options["concurrency"])
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def request():
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            async with in_flight:
+                await handler(dict(scope), receive, send)
+            return messages[0]["status"]
+
+        return await asyncio.gather(
+            *(request() for _i in range(options["requests"]))
+        )
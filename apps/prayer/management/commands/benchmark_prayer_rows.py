@@ -0,0 +1,97 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Substr
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.prayer.counters import with_prayer_counts
+from apps.prayer.models import Prayer, PrayerCategory, PrayerCountShard
+from apps.prayer.rows import PrayerRows
+from apps.prayer.serializers import PrayerSerializer
+from apps.prayer.views import SUMMARY_CONTENT_LENGTH
+from apps.users.models import User
+
+
+def create_sample(items):
+    """Prayers covering every author_name / category_name branch."""
+    authors = [
+        User.objects.create_user(
+            email=f"benchmark-{i}@example.com",
+            password=None,
+            first_name=first_name,
+            last_name=last_name,
+        )
+        for i, (first_name, last_name) in enumerate(
+            [("Ana", "Novak"), ("Ana", ""), ("", "Novak"), ("", "")]
+        )
+    ]
+    category = PrayerCategory.objects.create(name="Benchmark")
+    prayers = Prayer.objects.bulk_create(
+        Prayer(
+            title=f"Prayer request {i}",
+            content="Please pray for my family. " * 20,
+            author=authors[i % len(authors)],
+            category=category if i % 3 else None,
+            is_anonymous=i % 7 == 0,
+            prayer_count=i,
+        )
+        for i in range(items)
+    )
+    PrayerCountShard.objects.bulk_create(
+        PrayerCountShard(prayer=prayer, shard=0, count=2)
+        for prayer in prayers[::2]
+    )
+    return Prayer.objects.filter(pk__in=[prayer.pk for prayer in prayers])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the speed of the .values() fast path with the "
+        "serializers. The sample data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            queryset = with_prayer_counts(
+                create_sample(options["items"])
+            ).annotate(
+                content_summary=Substr("content", 1, SUMMARY_CONTENT_LENGTH)
+            )
+            request = self.request({})
+            for name, func in [
+                ("PrayerSerializer", self.serialize),
+                ("PrayerRows", self.render),
+            ]:
+                elapsed = self.time(
+                    lambda: func(queryset, request), options["repeat"]
+                )
+                per_call = elapsed / options["repeat"] * 1000
+                self.stdout.write(f"{name:<18} {per_call:8.2f} ms")
+            transaction.set_rollback(True)
+
+    def request(self, params):
+        return Request(APIRequestFactory().get("/", params))
+
+    def serialize(self, queryset, request, serializer_class=PrayerSerializer):
+        serializer = serializer_class(
+            queryset.select_related("author", "category"),
+            many=True,
+            context={"request": request},
+        )
+        return serializer.data
+
+    def render(self, queryset, request, serializer_class=PrayerSerializer):
+        rows = PrayerRows(serializer_class, request)
+        return rows.render(rows.values(queryset))
+
+    def time(self, func, repeat):
+        start = time.perf_counter()
+        for _i in range(repeat):
+            func()
+        return time.perf_counter() - start
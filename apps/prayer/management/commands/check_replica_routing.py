@@ -0,0 +1,77 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from apps.common.db import routers
+from apps.prayer.models import Group, Prayer
+from apps.users.models import User
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+EMAIL = "replica-check@example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the read-replica routing of the prayer and group endpoints "
+        "against a replica that does not receive the primary's writes, "
+        "e.g. a second SQLite file under the local settings "
+        "(DB_REPLICA_HOSTS=local, then migrate --database replica1). "
+        "Sample data is created on the primary and deleted again."
+    )
+
+    def handle(self, *args, **options):
+        aliases = routers.replicas()
+        if not aliases:
+            raise CommandError("No replica configured, set DB_REPLICA_HOSTS.")
+        for alias in aliases:
+            if User.objects.using(alias).filter(email=EMAIL).exists():
+                raise CommandError(
+                    f"{alias} has the primary's rows; use a replica "
+                    "that does not replicate."
+                )
+
+        User.objects.filter(email=EMAIL).delete()
+        user = User.objects.create_user(email=EMAIL, password=None)
+        group = Group.objects.create(
+            name="Replica check", created_by=user, is_private=False
+        )
+        prayer = Prayer.objects.create(
+            title="Replica check", content="Please pray.", author=user
+        )
+        client = APIClient()
+        token = ClaimsTokenObtainPairSerializer.get_token(user)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+        feed = "/api/v1/prayers/"
+        detail = f"/api/v1/groups/{group.pk}/"
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                self.expect(client, "GET", feed, 200, missing=prayer.pk)
+                self.expect(client, "GET", detail, 404)
+                self.expect(
+                    client, "POST", f"/api/v1/prayers/{prayer.pk}/pray/", 200
+                )
+                self.expect(client, "GET", feed, 200, present=prayer.pk)
+                self.expect(client, "POST", f"{detail}join/", 201)
+                self.expect(client, "GET", detail, 200)
+                cache.delete(routers._pin_key(user.pk))
+                self.expect(client, "GET", detail, 404)
+        finally:
+            cache.delete(routers._pin_key(user.pk))
+            group.delete()
+            user.delete()
+        self.stdout.write("Replica routing OK")
+
+    def expect(self, client, method, path, status, present=None, missing=None):
+        response = client.generic(method, path)
+        if response.status_code != status:
+            raise CommandError(
+                f"{method} {path}: {response.status_code} != {status}"
+            )
+        if present is not None or missing is not None:
+            ids = [item["id"] for item in response.json()["results"]]
+            if (present is not None and present not in ids) or (
+                missing is not None and missing in ids
+            ):
+                raise CommandError(f"{method} {path}: unexpected {ids}")
+        self.stdout.write(f"{method} {path}: {status}")
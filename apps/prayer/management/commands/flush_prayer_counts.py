@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.prayer.counters import flush_prayer_counts
+
+
+class Command(BaseCommand):
+    help = "Fold sharded prayer counts into Prayer.prayer_count."
+
+    def handle(self, *args, **options):
+        updated = flush_prayer_counts()
+        self.stdout.write(
+            self.style.SUCCESS(f"Flushed prayer counts for {updated} prayers")
+        )
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.prayer.models import MembershipChange, PrayerTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete prayer tombstones and membership changes older than the "
+        "sync retention window."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(
+            days=settings.PRAYER_SYNC_RETENTION_DAYS
+        )
+        deleted, _ = PrayerTombstone.objects.filter(
+            removed_at__lt=cutoff
+        ).delete()
+        changes, _ = MembershipChange.objects.filter(
+            changed_at__lt=cutoff
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} prayer tombstones "
+                f"and {changes} membership changes"
+            )
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.prayer.feed import backfill_member, fans_out_on_write
+from apps.prayer.models import FeedEntry, Group, GroupMembership
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized home feed from group prayers. "
+        "Run once after enabling FEED_MATERIALIZATION_ENABLED."
+    )
+
+    def handle(self, *args, **options):
+        FeedEntry.objects.all().delete()
+        groups = 0
+        for group in Group.objects.filter(fanout_on_read=False).iterator():
+            if not fans_out_on_write(group):
+                continue
+            groups += 1
+            member_ids = GroupMembership.objects.filter(
+                group=group
+            ).values_list("user_id", flat=True)
+            for user_id in member_ids.iterator():
+                backfill_member(user_id, group.pk)
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt feeds for {groups} groups")
+        )
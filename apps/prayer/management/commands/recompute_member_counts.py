@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from apps.prayer.memberships import refresh_member_counts
+from apps.prayer.models import Group
+
+
+class Command(BaseCommand):
+    help = "Recompute Group.member_count from GroupMembership rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report groups whose member_count is wrong.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Group.objects.annotate(actual=Count("members"))
+            .exclude(member_count=F("actual"))
+            .values_list("pk", flat=True)
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"{len(drifted)} groups have a wrong count")
+            return
+
+        updated = refresh_member_counts(Group.objects.filter(pk__in=drifted))
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired member_count for {updated} groups")
+        )
@@ -0,0 +1,157 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.common.cache import cached_as, invalidate_obj
+
+from .feed import schedule_member_backfill
+from .models import (
+    Group,
+    GroupMembership,
+    MembershipChange,
+    MembershipRequest,
+)
+from .realtime import publish_membership_approved
+
+
+def load_membership_roles(user):
+    """
+    Returns {group_id: role} for every group the user belongs to.
+    With the query cache enabled the result is cached for
+    MEMBERSHIP_CACHE_TIMEOUT seconds and dropped whenever the user's
+    memberships change.
+    """
+    if not user.is_authenticated:
+        return {}
+    memberships = GroupMembership.objects.filter(user=user)
+
+    def load():
+        return dict(memberships.values_list("group_id", "role"))
+
+    if not settings.QUERY_CACHE_ENABLED:
+        return load()
+    return cached_as(memberships, timeout=settings.MEMBERSHIP_CACHE_TIMEOUT)(
+        load
+    )()
+
+
+def get_membership_roles(request):
+    """
+    {group_id: role} for request.user, loaded once per request and shared
+    by the permission classes, serializers and views.
+    """
+    roles = getattr(request, "_membership_roles", None)
+    if roles is None:
+        roles = load_membership_roles(request.user)
+        request._membership_roles = roles
+    return roles
+
+
+async def aget_membership_roles(request):
+    """
+    get_membership_roles() for async views. The cached lookup of the
+    query cache is sync, so it runs in a thread.
+    """
+    roles = getattr(request, "_membership_roles", None)
+    if roles is not None:
+        return roles
+    if settings.QUERY_CACHE_ENABLED:
+        roles = await sync_to_async(load_membership_roles)(request.user)
+    elif not request.user.is_authenticated:
+        roles = {}
+    else:
+        # values(), since values_list().aiterator() runs its query
+        # outside the thread on Django 4.2
+        memberships = GroupMembership.objects.filter(user=request.user).values(
+            "group_id", "role"
+        )
+        roles = {
+            row["group_id"]: row["role"]
+            async for row in memberships.aiterator()
+        }
+    request._membership_roles = roles
+    return roles
+
+
+def related_group_id(obj):
+    """
+    The group an object belongs to: obj.group_id for prayers, memberships
+    and membership requests, or the primary key of a Group itself.
+    """
+    if hasattr(obj, "group_id"):
+        return obj.group_id
+    return obj.pk
+
+
+def refresh_member_counts(groups):
+    """Sets member_count of the given groups from their memberships."""
+    actual = (
+        GroupMembership.objects.filter(group=OuterRef("pk"))
+        .order_by()
+        .values("group")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return groups.update(member_count=Coalesce(Subquery(actual), 0))
+
+
+def approve_requests(requests):
+    """
+    Approves membership requests in bulk: one bulk_create() of the
+    memberships and one update() of the statuses. Neither sends model
+    signals, so the member counts, caches and feeds that
+    apps/prayer/signals.py keeps up to date are updated here.
+    """
+    group_ids = {req.group_id for req in requests}
+    with transaction.atomic():
+        GroupMembership.objects.bulk_create(
+            [
+                GroupMembership(
+                    user_id=req.user_id,
+                    group_id=req.group_id,
+                    role=GroupMembership.Role.MEMBER,
+                )
+                for req in requests
+            ],
+            ignore_conflicts=True,
+        )
+        MembershipChange.objects.bulk_create(
+            MembershipChange(
+                user_id=req.user_id,
+                group_id=req.group_id,
+                kind=MembershipChange.Kind.JOINED,
+            )
+            for req in requests
+        )
+        _set_status(requests, MembershipRequest.Status.APPROVED)
+        refresh_member_counts(Group.objects.filter(pk__in=group_ids))
+
+    groups = Group.objects.in_bulk(group_ids)
+    for group in groups.values():
+        invalidate_obj(group)
+    for req in requests:
+        membership = GroupMembership(
+            user_id=req.user_id, group=groups[req.group_id]
+        )
+        invalidate_obj(membership)
+        schedule_member_backfill(membership)
+        publish_membership_approved(req.group_id, req.user_id)
+
+
+def reject_requests(requests):
+    """Rejects membership requests in bulk with one update()."""
+    _set_status(requests, MembershipRequest.Status.REJECTED)
+
+
+def _set_status(requests, status):
+    now = timezone.now()
+    MembershipRequest.objects.filter(
+        pk__in=[req.pk for req in requests]
+    ).update(status=status, processed_at=now)
+    for req in requests:
+        req.status = status
+        req.processed_at = now
+        invalidate_obj(req)
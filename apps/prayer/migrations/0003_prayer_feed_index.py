@@ -0,0 +1,19 @@
+# Generated by Django 4.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0002_membershiprequest"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["-created_at", "id"], name="prayer_feed_idx"
+            ),
+        ),
+    ]
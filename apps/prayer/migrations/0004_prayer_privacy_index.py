@@ -0,0 +1,20 @@
+# Generated by Django 4.2.18 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0003_prayer_feed_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["privacy_level", "-created_at"],
+                name="prayer_privacy_idx",
+            ),
+        ),
+    ]
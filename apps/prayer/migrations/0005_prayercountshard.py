@@ -0,0 +1,41 @@
+# Generated by Django 4.2.18 on 2026-10-18 11:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0004_prayer_privacy_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PrayerCountShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "prayer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="count_shards",
+                        to="prayer.prayer",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("prayer", "shard")},
+            },
+        ),
+    ]
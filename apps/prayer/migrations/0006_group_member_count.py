@@ -0,0 +1,34 @@
+# Generated by Django 4.2.18 on 2026-10-18 12:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_member_count(apps, schema_editor):
+    Group = apps.get_model("prayer", "Group")
+    GroupMembership = apps.get_model("prayer", "GroupMembership")
+    actual = (
+        GroupMembership.objects.filter(group=OuterRef("pk"))
+        .order_by()
+        .values("group")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Group.objects.update(member_count=Coalesce(Subquery(actual), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0005_prayercountshard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="group",
+            name="member_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_member_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.18 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0006_group_member_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PrayerTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("prayer_id", models.BigIntegerField()),
+                ("author_id", models.BigIntegerField()),
+                ("group_id", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "privacy_level",
+                    models.CharField(
+                        choices=[
+                            ("public", "Public"),
+                            ("private", "Private"),
+                            ("group", "Group Only"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "removed_at",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["updated_at", "id"], name="prayer_sync_idx"
+            ),
+        ),
+    ]
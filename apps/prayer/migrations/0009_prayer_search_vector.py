@@ -0,0 +1,44 @@
+# Generated by Django 4.2.18 on 2026-10-18 14:55
+
+import apps.prayer.search
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Prayer = apps.get_model("prayer", "Prayer")
+    config = settings.PRAYER_SEARCH_CONFIG
+    Prayer.objects.update(
+        search_vector=SearchVector("title", weight="A", config=config)
+        + SearchVector("content", weight="B", config=config)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0008_feedentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="prayer",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=apps.prayer.search.SearchVectorIndex(
+                fields=["search_vector"], name="prayer_search_idx"
+            ),
+        ),
+        migrations.RunPython(
+            populate_search_vector, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0009_prayer_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["status", "-created_at"], name="prayer_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["group", "-created_at"], name="prayer_group_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["category", "-created_at"], name="prayer_category_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["author", "-created_at"], name="prayer_author_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.18 on 2026-10-18 05:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0010_prayer_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="prayercountshard",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="prayercountshard",
+            index=models.Index(
+                fields=["updated_at"], name="prayer_shard_updated_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.18 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0011_prayercountshard_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MembershipChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.BigIntegerField()),
+                ("group_id", models.BigIntegerField()),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("joined", "Joined"), ("left", "Left")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["user_id", "changed_at"],
+                        name="membership_change_user_idx",
+                    )
+                ],
+            },
+        ),
+    ]
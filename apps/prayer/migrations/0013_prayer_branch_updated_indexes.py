@@ -0,0 +1,33 @@
+# Generated by Django 4.2.18 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("prayer", "0012_membershipchange"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["privacy_level", "updated_at"],
+                name="prayer_privacy_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["author", "updated_at"],
+                name="prayer_author_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="prayer",
+            index=models.Index(
+                fields=["group", "updated_at"], name="prayer_group_updated_idx"
+            ),
+        ),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models  # noqa: F401
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction  # noqa: F401
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from apps.users.models import User
 
+from .search import SearchVectorIndex
+
 
 class PrayerCategory(models.Model):
     name = models.CharField(_("Name"), max_length=100)
@@ -65,15 +68,148 @@ class Prayer(models.Model):
     is_anonymous = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by apps/prayer/search.py (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = _("Prayer")
         verbose_name_plural = _("Prayers")
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "id"], name="prayer_feed_idx"),
+            models.Index(
+                fields=["privacy_level", "-created_at"],
+                name="prayer_privacy_idx",
+            ),
+            models.Index(fields=["updated_at", "id"], name="prayer_sync_idx"),
+            # Newest change per visibility branch, which versions the feed
+            # (apps/prayer/views.py)
+            models.Index(
+                fields=["privacy_level", "updated_at"],
+                name="prayer_privacy_updated_idx",
+            ),
+            models.Index(
+                fields=["author", "updated_at"],
+                name="prayer_author_updated_idx",
+            ),
+            models.Index(
+                fields=["group", "updated_at"],
+                name="prayer_group_updated_idx",
+            ),
+            # Feed filters, see apps/prayer/filters.py
+            models.Index(
+                fields=["status", "-created_at"], name="prayer_status_idx"
+            ),
+            models.Index(
+                fields=["group", "-created_at"], name="prayer_group_idx"
+            ),
+            models.Index(
+                fields=["category", "-created_at"],
+                name="prayer_category_idx",
+            ),
+            models.Index(
+                fields=["author", "-created_at"], name="prayer_author_idx"
+            ),
+            SearchVectorIndex(
+                fields=["search_vector"], name="prayer_search_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def total_prayer_count(self):
+        """
+        Folded prayer_count plus the increments still sitting in shards.
+        Querysets can annotate pending_prayer_count to avoid the extra query.
+        """
+        pending = getattr(self, "pending_prayer_count", None)
+        if pending is None:
+            pending = (
+                self.count_shards.aggregate(total=models.Sum("count"))["total"]
+                or 0
+            )
+        return self.prayer_count + pending
+
+
+class PrayerCountShard(models.Model):
+    """
+    One of N counter rows for a prayer.
+    Taps increment a random shard, so concurrent taps on a popular prayer
+    do not all queue on the same row lock.
+    """
+
+    prayer = models.ForeignKey(
+        Prayer, on_delete=models.CASCADE, related_name="count_shards"
+    )
+    shard = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    # Time of the last tap, which versions the feed (apps/prayer/views.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ["prayer", "shard"]
+        indexes = [
+            models.Index(
+                fields=["updated_at"], name="prayer_shard_updated_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"PrayerCountShard(prayer={self.prayer_id}, shard={self.shard})"
+
+
+class PrayerTombstone(models.Model):
+    """
+    Record of a prayer that was deleted or whose privacy level or group
+    changed, so it may have left some users' view. Stores the visibility
+    the prayer had before, which decides who is told about it when
+    syncing (see apps/prayer/sync.py).
+    """
+
+    prayer_id = models.BigIntegerField()
+    author_id = models.BigIntegerField()
+    group_id = models.BigIntegerField(null=True, blank=True)
+    privacy_level = models.CharField(
+        max_length=10, choices=Prayer.PrivacyLevel.choices
+    )
+    removed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"PrayerTombstone(prayer={self.prayer_id})"
+
+
+class MembershipChange(models.Model):
+    """
+    Record of a user joining or leaving a group, which changes the group
+    prayers they can see without touching the prayers themselves (see
+    apps/prayer/sync.py). Written by the GroupMembership signals.
+    """
+
+    class Kind(models.TextChoices):
+        JOINED = "joined", _("Joined")
+        LEFT = "left", _("Left")
+
+    user_id = models.BigIntegerField()
+    group_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    changed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user_id", "changed_at"],
+                name="membership_change_user_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"MembershipChange(user={self.user_id}, group={self.group_id}, "
+            f"{self.kind})"
+        )
+
 
 class Group(models.Model):
     name = models.CharField(_("Name"), max_length=200)
@@ -85,6 +221,12 @@ class Group(models.Model):
     members = models.ManyToManyField(
         User, through="GroupMembership", related_name="prayer_groups"
     )
+    # Denormalized number of GroupMembership rows,
+    # maintained by the signals in apps/prayer/signals.py
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    # Set once the group is too large to fan prayers out to members,
+    # see apps/prayer/feed.py
+    fanout_on_read = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -92,9 +234,32 @@ class Group(models.Model):
         verbose_name_plural = _("Prayer Groups")
         ordering = ["name"]
 
+    # Written with update() elsewhere, never by save()
+    MAINTAINED_FIELDS = ("member_count", "fanout_on_read")
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, update_fields=None, **kwargs):
+        """
+        Saving an existing group leaves out MAINTAINED_FIELDS, so a copy
+        loaded before a membership change cannot write back a stale
+        member_count.
+        """
+        if not self._state.adding:
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            update_fields = [
+                name
+                for name in update_fields
+                if name not in self.MAINTAINED_FIELDS
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class GroupMembership(models.Model):
     class Role(models.TextChoices):
@@ -113,6 +278,36 @@ class GroupMembership(models.Model):
         unique_together = ["user", "group"]
 
 
+class FeedEntry(models.Model):
+    """
+    A group prayer materialized into a member's timeline.
+    Written in the background when the prayer is created,
+    see apps/prayer/feed.py.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    prayer = models.ForeignKey(
+        Prayer, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    group = models.ForeignKey(
+        Group, on_delete=models.CASCADE, related_name="feed_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ["user", "prayer"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"], name="feed_entry_user_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"FeedEntry(user={self.user_id}, prayer={self.prayer_id})"
+
+
 class MembershipRequest(models.Model):
     """
     Model for membership requests to private groups.
@@ -143,15 +338,18 @@ class MembershipRequest(models.Model):
     def approve(self):
         """Approval of the request — create GroupMembership."""
         from .models import GroupMembership
+        from .realtime import publish_membership_approved
 
-        GroupMembership.objects.get_or_create(
-            user=self.user,
-            group=self.group,
-            defaults={"role": GroupMembership.Role.MEMBER},
-        )
-        self.status = self.Status.APPROVED
-        self.processed_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            GroupMembership.objects.get_or_create(
+                user=self.user,
+                group=self.group,
+                defaults={"role": GroupMembership.Role.MEMBER},
+            )
+            self.status = self.Status.APPROVED
+            self.processed_at = timezone.now()
+            self.save()
+            publish_membership_approved(self.group_id, self.user_id)
 
     def reject(self):
         """Rejection of the request — simply set the status to rejected."""
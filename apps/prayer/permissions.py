@@ -1,5 +1,6 @@
 from rest_framework import permissions
 
+from apps.prayer.memberships import get_membership_roles, related_group_id
 from apps.prayer.models import GroupMembership
 
 
@@ -10,12 +11,9 @@ class IsGroupMember(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        # If the object has an attribute "group", check membership via obj.group.members
-        if hasattr(obj, "group"):
-            return obj.group.members.filter(id=request.user.id).exists()
-
-        # Otherwise, assume obj itself might be a Group, so check obj.members
-        return obj.members.filter(id=request.user.id).exists()
+        # obj is either a Group or has a "group" (e.g. a Prayer)
+        group_id = related_group_id(obj)
+        return group_id in get_membership_roles(request)
 
 
 class IsGroupAdmin(permissions.BasePermission):
@@ -25,13 +23,7 @@ class IsGroupAdmin(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        # If the object has an attribute "group" (e.g. a Prayer referencing a Group)...
-        if hasattr(obj, "group"):
-            return obj.group.groupmembership_set.filter(
-                user=request.user, role=GroupMembership.Role.ADMIN
-            ).exists()
-
-        # Otherwise, assume obj is the Group itself
-        return obj.groupmembership_set.filter(
-            user=request.user, role=GroupMembership.Role.ADMIN
-        ).exists()
+        # obj is either a Group or has a "group" (e.g. a Prayer)
+        group_id = related_group_id(obj)
+        role = get_membership_roles(request).get(group_id)
+        return role == GroupMembership.Role.ADMIN
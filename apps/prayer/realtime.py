@@ -0,0 +1,150 @@
+"""
+Realtime events for prayers and groups.
+
+Events are published to two kinds of channels (apps/common/broker.py):
+``group:<id>`` announces new prayers and approved members of a group,
+``prayer:<id>`` carries the prayer count of a prayer. Taps on "pray"
+are coalesced per prayer for REALTIME_COALESCE_SECONDS, so a burst of
+taps becomes one message with the resulting count. Clients subscribe
+over the WebSocket in apps/prayer/websocket.py.
+
+ACCESS_CHANGED is published to ``prayer:<id>`` when the prayer's
+visibility changes, and to ``user:<id>`` when the user leaves a group.
+The WebSocket checks the affected subscriptions again on receiving it
+and does not forward it.
+"""
+
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from apps.common.broker import publish
+
+from .counters import with_prayer_counts
+from .models import Prayer
+
+logger = logging.getLogger(__name__)
+
+# Privacy levels whose new prayers are announced to the group channel
+ANNOUNCED_PRIVACY_LEVELS = (
+    Prayer.PrivacyLevel.PUBLIC,
+    Prayer.PrivacyLevel.GROUP,
+)
+
+
+ACCESS_CHANGED = json.dumps({"event": "access.changed"})
+
+
+def group_channel(group_id):
+    return f"group:{group_id}"
+
+
+def prayer_channel(prayer_id):
+    return f"prayer:{prayer_id}"
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def parse_channel(channel):
+    """Returns (kind, id) for "group:<id>" / "prayer:<id>", else None."""
+    kind, _sep, pk = str(channel).partition(":")
+    if kind not in ("group", "prayer") or not pk.isdigit():
+        return None
+    return kind, int(pk)
+
+
+def _publish(channel, event, **data):
+    publish(channel, json.dumps({"event": event, **data}))
+
+
+def publish_prayer_created(prayer):
+    """Announces a new prayer to its group once the transaction commits."""
+    if prayer.group_id is None:
+        return
+    if prayer.privacy_level not in ANNOUNCED_PRIVACY_LEVELS:
+        return
+    transaction.on_commit(
+        lambda: _publish(
+            group_channel(prayer.group_id),
+            "prayer.created",
+            prayer=prayer.pk,
+            group=prayer.group_id,
+        )
+    )
+
+
+def publish_membership_approved(group_id, user_id):
+    transaction.on_commit(
+        lambda: _publish(
+            group_channel(group_id),
+            "membership.approved",
+            group=group_id,
+            user=user_id,
+        )
+    )
+
+
+def publish_access_changed(channel):
+    """Sends ACCESS_CHANGED to channel once the transaction commits."""
+    transaction.on_commit(lambda: publish(channel, ACCESS_CHANGED))
+
+
+class PrayerCountCoalescer:
+    """
+    Collects the ids of prayers prayed for and publishes their counts
+    once per window, read with one query when the window closes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._timer = None
+
+    def add(self, prayer_id):
+        with self._lock:
+            self._pending.add(int(prayer_id))
+            if self._timer is None:
+                self._timer = threading.Timer(
+                    settings.REALTIME_COALESCE_SECONDS, self.flush
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            prayer_ids, self._pending = self._pending, set()
+            self._timer = None
+        if not prayer_ids:
+            return
+        try:
+            counts = with_prayer_counts(
+                Prayer.objects.filter(pk__in=prayer_ids)
+            ).values_list("pk", "prayer_count", "pending_prayer_count")
+            for pk, prayer_count, pending in counts:
+                _publish(
+                    prayer_channel(pk),
+                    "prayer.prayed",
+                    prayer=pk,
+                    prayer_count=prayer_count + pending,
+                )
+        except Exception:
+            logger.exception("Publishing prayer counts failed")
+        finally:
+            # Each window runs in a new timer thread
+            connections.close_all()
+
+
+_coalescer = PrayerCountCoalescer()
+
+
+def publish_prayer_count(prayer_id):
+    """
+    Queues a count update for the prayer. Does no I/O, so async views
+    can call it too.
+    """
+    _coalescer.add(prayer_id)
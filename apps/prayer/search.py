@@ -0,0 +1,64 @@
+"""
+Full-text search over prayer titles and contents.
+
+On PostgreSQL each prayer stores a weighted tsvector in search_vector
+(title A, content B), refreshed when the prayer is saved, and searches
+are a GIN index lookup ranked by ts_rank. Other databases (SQLite in
+local settings) have no tsvector, so search falls back to icontains.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connections, models
+from django.db.models import F, Q, Value
+
+
+def is_supported(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def search_vector():
+    config = settings.PRAYER_SEARCH_CONFIG
+    return SearchVector("title", weight="A", config=config) + SearchVector(
+        "content", weight="B", config=config
+    )
+
+
+def update_search_vectors(prayers):
+    """Recomputes search_vector for a queryset of prayers."""
+    if is_supported(prayers):
+        prayers.update(search_vector=search_vector())
+
+
+def search_prayers(queryset, text):
+    """Filters prayers matching text and annotates them with a rank."""
+    if not is_supported(queryset):
+        return queryset.filter(
+            Q(title__icontains=text) | Q(content__icontains=text)
+        ).annotate(rank=Value(0.0))
+
+    query = SearchQuery(
+        text, search_type="websearch", config=settings.PRAYER_SEARCH_CONFIG
+    )
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F("search_vector"), query)
+    )
+
+
+class SearchVectorIndex(GinIndex):
+    """
+    GIN index on PostgreSQL. Elsewhere the column is never filled, so a
+    plain index is created instead to keep migrations working.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return models.Index.create_sql(
+                self, model, schema_editor, using=using, **kwargs
+            )
+        return super().create_sql(model, schema_editor, using, **kwargs)
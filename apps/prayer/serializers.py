@@ -1,4 +1,11 @@
 from rest_framework import serializers
+
+from apps.common.serializers import SparseFieldsetMixin
+
+from .feed import schedule_fan_out
+from .memberships import get_membership_roles
+from .realtime import publish_prayer_created
+from .search import update_search_vectors
 from .models import (
     Prayer,
     PrayerCategory,
@@ -15,12 +22,49 @@ class PrayerCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at"]
 
 
-class PrayerSerializer(serializers.ModelSerializer):
+class PrayerListSerializer(serializers.ListSerializer):
+    """
+    Creates all prayers with one bulk_create(). That sends no post_save,
+    so the search vectors, fan-out and realtime events normally handled
+    by apps/prayer/signals.py are handled here.
+    """
+
+    def create(self, validated_data):
+        prayers = Prayer.objects.bulk_create(
+            [Prayer(**attrs) for attrs in validated_data]
+        )
+        update_search_vectors(
+            Prayer.objects.filter(pk__in=[prayer.pk for prayer in prayers])
+        )
+        for prayer in prayers:
+            # A new prayer has no counter shards yet
+            prayer.pending_prayer_count = 0
+            schedule_fan_out(prayer)
+            publish_prayer_created(prayer)
+        return prayers
+
+
+class PrayerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author_name = serializers.SerializerMethodField()
     category_name = serializers.SerializerMethodField()
+    prayer_count = serializers.IntegerField(
+        source="total_prayer_count", read_only=True
+    )
+
+    # Relations and columns read by get_author_name/get_category_name,
+    # see apps.common.querysets.optimize_for_serializer
+    select_related_fields = {
+        "author": ["first_name", "last_name", "email"],
+        "category": ["name"],
+    }
+    field_columns = {
+        "author_name": ["is_anonymous", "author"],
+        "category_name": ["category"],
+    }
 
     class Meta:
         model = Prayer
+        list_serializer_class = PrayerListSerializer
         fields = [
             "id",
             "title",
@@ -53,10 +97,21 @@ class PrayerSerializer(serializers.ModelSerializer):
         return obj.category.name if obj.category else None
 
 
-class GroupSerializer(serializers.ModelSerializer):
-    member_count = serializers.SerializerMethodField()
-    is_member = serializers.BooleanField(read_only=True)
-    user_membership_status = serializers.SerializerMethodField()
+class PrayerSummarySerializer(PrayerSerializer):
+    """
+    Compact prayer for list screens: content is the preview annotated as
+    content_summary (see PrayerViewSet), so the full text is not loaded.
+    """
+
+    content = serializers.CharField(source="content_summary", read_only=True)
+
+    field_columns = {**PrayerSerializer.field_columns, "content": []}
+
+
+class GroupSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    is_member = serializers.SerializerMethodField()
+    # Annotated in GroupViewSet.get_queryset
+    user_membership_status = serializers.CharField(read_only=True)
 
     class Meta:
         model = Group
@@ -71,21 +126,11 @@ class GroupSerializer(serializers.ModelSerializer):
             "is_member",
             "user_membership_status",
         ]
-        read_only_fields = ["created_by", "created_at"]
-
-    def get_member_count(self, obj):
-        return obj.members.count()
+        read_only_fields = ["created_by", "member_count", "created_at"]
 
-    def get_user_membership_status(self, obj):
-        user = self.context["request"].user
-        membership_request = MembershipRequest.objects.filter(
-            group=obj, user=user
-        ).first()
-        if membership_request:
-            return (
-                membership_request.status
-            )  # 'pending', 'approved', 'rejected'
-        return "no_request"
+    def get_is_member(self, obj):
+        roles = get_membership_roles(self.context["request"])
+        return obj.pk in roles
 
 
 class GroupMembershipSerializer(serializers.ModelSerializer):
@@ -128,3 +173,10 @@ class MembershipRequestSerializer(serializers.ModelSerializer):
             "reason",
         ]
         read_only_fields = ["status", "created_at", "processed_at"]
+
+
+class MembershipRequestBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=1000
+    )
+    action = serializers.ChoiceField(choices=["approve", "reject"])
@@ -0,0 +1,139 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.common.cache import invalidate_obj
+
+from .feed import (
+    remove_member,
+    remove_prayer,
+    schedule_fan_out,
+    schedule_member_backfill,
+)
+from .models import (
+    Group,
+    GroupMembership,
+    MembershipChange,
+    Prayer,
+    PrayerTombstone,
+)
+from .realtime import (
+    prayer_channel,
+    publish_access_changed,
+    publish_prayer_created,
+    user_channel,
+)
+from .search import update_search_vectors
+
+
+@receiver(post_save, sender=GroupMembership)
+def increment_member_count(sender, instance, created, **kwargs):
+    """Keep Group.member_count in step with new memberships."""
+    if created:
+        Group.objects.filter(pk=instance.group_id).update(
+            member_count=F("member_count") + 1
+        )
+        invalidate_obj(instance.group)
+        schedule_member_backfill(instance)
+        MembershipChange.objects.create(
+            user_id=instance.user_id,
+            group_id=instance.group_id,
+            kind=MembershipChange.Kind.JOINED,
+        )
+
+
+@receiver(post_delete, sender=GroupMembership)
+def decrement_member_count(sender, instance, **kwargs):
+    """
+    Keep Group.member_count in step with removed memberships, and end the
+    user's realtime subscriptions to the group.
+    Also runs for cascades, e.g. when a user account is deleted.
+    """
+    Group.objects.filter(pk=instance.group_id, member_count__gt=0).update(
+        member_count=F("member_count") - 1
+    )
+    invalidate_obj(Group(pk=instance.group_id))
+    if settings.FEED_MATERIALIZATION_ENABLED:
+        remove_member(instance.user_id, instance.group_id)
+    publish_access_changed(user_channel(instance.user_id))
+    MembershipChange.objects.create(
+        user_id=instance.user_id,
+        group_id=instance.group_id,
+        kind=MembershipChange.Kind.LEFT,
+    )
+
+
+def _tombstone(prayer_id, author_id, group_id, privacy_level):
+    PrayerTombstone.objects.create(
+        prayer_id=prayer_id,
+        author_id=author_id,
+        group_id=group_id,
+        privacy_level=privacy_level,
+    )
+
+
+@receiver(pre_save, sender=Prayer)
+def remember_prayer_visibility(sender, instance, **kwargs):
+    """
+    Load the stored privacy level and group of an existing prayer,
+    so post_save can tell whether its visibility changed.
+    """
+    instance._visibility_before = None
+    if instance._state.adding or instance.pk is None:
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {"privacy_level", "group"} & set(
+        update_fields
+    ):
+        return
+    instance._visibility_before = (
+        Prayer.objects.filter(pk=instance.pk)
+        .values("author_id", "group_id", "privacy_level")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Prayer)
+def tombstone_visibility_change(sender, instance, created, **kwargs):
+    before = getattr(instance, "_visibility_before", None)
+    if created:
+        schedule_fan_out(instance)
+        return
+    if before is None:
+        return
+    if (
+        before["privacy_level"] != instance.privacy_level
+        or before["group_id"] != instance.group_id
+    ):
+        _tombstone(instance.pk, **before)
+        # Entries of the old group must not outlive the move, whether or
+        # not the prayer is fanned out again
+        remove_prayer(instance.pk)
+        schedule_fan_out(instance)
+        publish_access_changed(prayer_channel(instance.pk))
+
+
+@receiver(post_save, sender=Prayer)
+def announce_new_prayer(sender, instance, created, **kwargs):
+    if created:
+        publish_prayer_created(instance)
+
+
+@receiver(post_save, sender=Prayer)
+def refresh_search_vector(sender, instance, created, update_fields, **kwargs):
+    if update_fields is not None and not {"title", "content"} & set(
+        update_fields
+    ):
+        return
+    update_search_vectors(Prayer.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Prayer)
+def tombstone_deleted_prayer(sender, instance, **kwargs):
+    _tombstone(
+        instance.pk,
+        instance.author_id,
+        instance.group_id,
+        instance.privacy_level,
+    )
@@ -0,0 +1,153 @@
+"""
+Delta sync for the prayer feed.
+
+A sync token is the (updated_at, id) position of the last change the
+client has seen. Changes are read with a keyset scan on the
+(updated_at, id) index; removals come from PrayerTombstone. Joining or
+leaving a group changes the visible prayers without touching them, so
+MembershipChange adds the older prayers of joined groups to the changes
+and those of left groups to the removals.
+"""
+
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import GroupMembership, MembershipChange, Prayer, PrayerTombstone
+from .visibility import member_group_ids, visible_prayers
+
+
+CLOCK_MARGIN = timedelta(seconds=5)
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+class SyncTokenExpired(Exception):
+    """The token is older than the tombstone retention window."""
+
+
+def encode_token(updated_at, pk):
+    raw = f"{updated_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_token(token):
+    """
+    Returns (updated_at, pk) for a token from a previous sync.
+    A plain ISO 8601 datetime is accepted too, for the first sync.
+    """
+    try:
+        position = parse_datetime(token)
+    except ValueError:
+        raise InvalidSyncToken(token)
+    if position is not None:
+        return position, 0
+    try:
+        raw = base64.urlsafe_b64decode(token.encode()).decode()
+        updated_at, pk = raw.split("|")
+        position = parse_datetime(updated_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidSyncToken(token)
+    if position is None:
+        raise InvalidSyncToken(token)
+    return position, pk
+
+
+def changes_since(user, token, queryset, limit):
+    """
+    Returns (changed, removed_ids, next_token, has_more).
+
+    ``queryset`` is the user's visible prayer queryset, ``changed`` holds at
+    most ``limit`` prayers created or updated after the token, followed by
+    the older prayers of groups the user joined since then, and
+    ``removed_ids`` the prayers that were deleted or moved out of the
+    user's view since then. Raises SyncTokenExpired if a joined group has
+    more than ``limit`` older prayers; the client refetches the feed.
+    """
+    updated_at, pk = decode_token(token)
+    if timezone.is_naive(updated_at):
+        updated_at = timezone.make_aware(updated_at)
+    retention = timedelta(days=settings.PRAYER_SYNC_RETENTION_DAYS)
+    if updated_at < timezone.now() - retention:
+        raise SyncTokenExpired(token)
+
+    changed = list(
+        queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+        ).order_by("updated_at", "id")[: limit + 1]
+    )
+    has_more = len(changed) > limit
+    changed = changed[:limit]
+    position = (updated_at, pk)
+    if changed:
+        position = (changed[-1].updated_at, changed[-1].pk)
+
+    joined, left = membership_changes(user, updated_at)
+    if joined:
+        # Prayers the keyset scan skips since they changed before the token
+        older = list(
+            queryset.filter(group_id__in=joined)
+            .filter(
+                Q(updated_at__lt=updated_at)
+                | Q(updated_at=updated_at, id__lte=pk)
+            )
+            .order_by("updated_at", "id")[: limit + 1]
+        )
+        if len(older) > limit:
+            raise SyncTokenExpired(token)
+        changed += older
+
+    group_prayers = Q(privacy_level=Prayer.PrivacyLevel.GROUP)
+    tombstones = PrayerTombstone.objects.filter(
+        Q(privacy_level=Prayer.PrivacyLevel.PUBLIC)
+        | Q(author_id=user.pk)
+        | group_prayers & Q(group_id__in=member_group_ids(user))
+        | group_prayers & Q(group_id__in=left),
+        removed_at__gte=updated_at,
+    )
+    removed = set(tombstones.values_list("prayer_id", flat=True))
+    if left:
+        removed.update(
+            Prayer.objects.filter(
+                group_prayers, group_id__in=left
+            ).values_list("pk", flat=True)
+        )
+    if removed:
+        # A prayer that changed privacy may still be visible to this user
+        removed -= set(
+            visible_prayers(user)
+            .filter(pk__in=removed)
+            .values_list("pk", flat=True)
+        )
+
+    if not has_more:
+        # Leave a margin for transactions that were still in flight,
+        # the overlap only means a few items are sent twice
+        position = max(position, (timezone.now() - CLOCK_MARGIN, 0))
+    return changed, sorted(removed), encode_token(*position), has_more
+
+
+def membership_changes(user, since):
+    """
+    (joined, left): ids of the groups the user joined and is still in,
+    and of the groups they left and did not rejoin, since the datetime.
+    """
+    changes = MembershipChange.objects.filter(
+        user_id=user.pk, changed_at__gte=since
+    ).values_list("group_id", flat=True)
+    group_ids = set(changes)
+    if not group_ids:
+        return set(), set()
+    current = set(
+        GroupMembership.objects.filter(
+            user=user, group_id__in=group_ids
+        ).values_list("group_id", flat=True)
+    )
+    return current, group_ids - current
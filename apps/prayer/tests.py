@@ -1,3 +1,1212 @@
-from django.test import TestCase  # noqa: F401
+import asyncio
+import io
+import json
+import threading
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import admin
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, Sum
+from django.db.models.functions import Substr
+from django.test import (
+    AsyncClient,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, resolve
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.common.broker import publish
+from apps.users.models import User
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+from .counters import (
+    flush_prayer_counts,
+    increment_prayer_count,
+    with_prayer_counts,
+)
+from .models import (
+    FeedEntry,
+    Group,
+    GroupMembership,
+    MembershipChange,
+    MembershipRequest,
+    Prayer,
+    PrayerCategory,
+    PrayerCountShard,
+)
+from .rows import PrayerRows
+from .serializers import PrayerSerializer, PrayerSummarySerializer
+from .realtime import group_channel, prayer_channel
+from .views import SUMMARY_CONTENT_LENGTH, GroupViewSet, PrayerViewSet
+from .visibility import visible_prayers
+from .websocket import database_sync_to_async, websocket_application
+
+
+def create_user(email, **kwargs):
+    return User.objects.create_user(email=email, password=None, **kwargs)
+
+
+@override_settings(
+    FEED_MATERIALIZATION_ENABLED=True, BACKGROUND_TASKS_EAGER=True
+)
+class MaterializedFeedVisibilityTests(TestCase):
+    def setUp(self):
+        self.author = create_user("author@example.com")
+        self.member = create_user("member@example.com")
+        self.group_a = Group.objects.create(name="A", created_by=self.author)
+        self.group_b = Group.objects.create(name="B", created_by=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            for user, group in [
+                (self.author, self.group_a),
+                (self.author, self.group_b),
+                (self.member, self.group_a),
+            ]:
+                GroupMembership.objects.create(user=user, group=group)
+            self.prayer = Prayer.objects.create(
+                title="Prayer",
+                content="Please pray.",
+                author=self.author,
+                group=self.group_a,
+                privacy_level=Prayer.PrivacyLevel.GROUP,
+            )
+
+    def visible_to_member(self):
+        return visible_prayers(self.member).filter(pk=self.prayer.pk).exists()
+
+    def test_group_prayer_is_visible_to_members(self):
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.member, prayer=self.prayer
+            ).exists()
+        )
+        self.assertTrue(self.visible_to_member())
+
+    def test_moved_prayer_leaves_old_group_timelines(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prayer.group = self.group_b
+            self.prayer.save()
+
+        self.assertFalse(self.visible_to_member())
+        self.assertFalse(
+            FeedEntry.objects.filter(
+                user=self.member, prayer=self.prayer
+            ).exists()
+        )
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.author, prayer=self.prayer, group=self.group_b
+            ).exists()
+        )
+
+    def test_stale_entry_of_another_group_is_ignored(self):
+        Prayer.objects.filter(pk=self.prayer.pk).update(group=self.group_b)
+
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.member, prayer=self.prayer, group=self.group_a
+            ).exists()
+        )
+        self.assertFalse(self.visible_to_member())
+
+
+def or_visible_prayers(user, queryset=None):
+    """The OR + JOIN + DISTINCT filter that visible_prayers() replaced."""
+    if queryset is None:
+        queryset = Prayer.objects.all()
+    return queryset.filter(
+        Q(privacy_level=Prayer.PrivacyLevel.PUBLIC)
+        | Q(author=user)
+        | Q(privacy_level=Prayer.PrivacyLevel.GROUP, group__members=user)
+    ).distinct()
+
+
+class VisiblePrayersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(f"user{i}@example.com") for i in range(3)]
+        owner = cls.users[0]
+        cls.groups = [
+            Group.objects.create(name=name, created_by=owner)
+            for name in ("A", "B", "C")
+        ]
+        # user0 in A and B, user1 in B, user2 in none
+        for user, group in [
+            (cls.users[0], cls.groups[0]),
+            (cls.users[0], cls.groups[1]),
+            (cls.users[1], cls.groups[1]),
+        ]:
+            GroupMembership.objects.create(user=user, group=group)
+        for author in cls.users:
+            for privacy_level in Prayer.PrivacyLevel.values:
+                for group in [None, *cls.groups]:
+                    Prayer.objects.create(
+                        title="Prayer",
+                        content="Please pray.",
+                        author=author,
+                        group=group,
+                        privacy_level=privacy_level,
+                    )
+
+    def assert_same_as_or_filter(self):
+        querysets = [None] + [
+            Prayer.objects.filter(group=group) for group in self.groups
+        ]
+        for user in self.users:
+            for queryset in querysets:
+                with self.subTest(user=user.email, queryset=queryset):
+                    self.assertQuerySetEqual(
+                        visible_prayers(user, queryset).order_by("pk"),
+                        or_visible_prayers(user, queryset).order_by("pk"),
+                    )
+
+    def test_same_prayers_as_or_filter(self):
+        self.assert_same_as_or_filter()
+
+    @override_settings(QUERY_CACHE_ENABLED=True)
+    def test_same_prayers_as_or_filter_with_cached_memberships(self):
+        self.assert_same_as_or_filter()
+
+    @override_settings(FEED_MATERIALIZATION_ENABLED=True)
+    def test_same_prayers_as_or_filter_with_materialized_feed(self):
+        from .feed import fan_out_prayer
+
+        for prayer in Prayer.objects.all():
+            fan_out_prayer(prayer.pk)
+        self.assert_same_as_or_filter()
+
+    def test_conditions_are_combined_without_joins(self):
+        for materialized in (False, True):
+            with self.settings(FEED_MATERIALIZATION_ENABLED=materialized):
+                sql = str(visible_prayers(self.users[0]).query)
+            # Subqueries may join, the prayers themselves are not joined
+            self.assertNotIn("JOIN", sql.split(" WHERE ")[0])
+            for keyword in ("UNION", "DISTINCT"):
+                self.assertNotIn(keyword, sql)
+
+    def feed_page_plan(self):
+        page = visible_prayers(self.users[0]).order_by("-created_at", "id")
+        return page[:20].explain()
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN")
+    def test_sqlite_plan_searches_an_index_per_condition(self):
+        plan = self.feed_page_plan()
+        # Every row comes from an index search, none from a table scan
+        self.assertNotRegex(plan, r"SCAN prayer_prayer(?! USING)")
+        self.assertIn("SEARCH prayer_prayer USING INDEX", plan)
+        for step in ("COMPOUND", "UNION", "DISTINCT"):
+            self.assertNotIn(step, plan)
+
+    @skipUnless(connection.vendor == "postgresql", "EXPLAIN on PostgreSQL")
+    def test_postgresql_plan_does_not_deduplicate(self):
+        plan = self.feed_page_plan()
+        for node in ("Unique", "Append", "SetOp", "Nested Loop"):
+            self.assertNotIn(node, plan)
+
+
+class PrayerRowsParityTests(TestCase):
+    # (serializer class, query string) pairs whose output must match
+    cases = [
+        (PrayerSerializer, {}),
+        (PrayerSerializer, {"fields": "id,author_name,prayer_count"}),
+        (PrayerSerializer, {"omit": "content,category_name"}),
+        (PrayerSummarySerializer, {}),
+        (PrayerSummarySerializer, {"fields": "content,updated_at"}),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [
+            create_user(
+                f"author{i}@example.com",
+                first_name=first_name,
+                last_name=last_name,
+            )
+            for i, (first_name, last_name) in enumerate(
+                [
+                    ("Ana", "Novak"),
+                    ("Ana", ""),
+                    ("", "Novak"),
+                    ("", ""),
+                    ("\t", ""),
+                    (" Ana\n", "Novak\u00a0"),
+                ]
+            )
+        ]
+        category = PrayerCategory.objects.create(name="Health")
+        for i in range(3 * len(authors)):
+            prayer = Prayer.objects.create(
+                title=f"Prayer {i}",
+                content="Please pray for my family. " * 10,
+                author=authors[i % len(authors)],
+                category=category if i % 3 else None,
+                is_anonymous=i % 5 == 0,
+                prayer_count=i,
+            )
+            if i % 2:
+                PrayerCountShard.objects.create(
+                    prayer=prayer, shard=0, count=2
+                )
+
+    def test_rows_render_like_serializers(self):
+        queryset = (
+            with_prayer_counts(Prayer.objects.all())
+            .annotate(
+                content_summary=Substr("content", 1, SUMMARY_CONTENT_LENGTH)
+            )
+            .order_by("-created_at", "id")
+        )
+        for serializer_class, params in self.cases:
+            with self.subTest(serializer=serializer_class.__name__, **params):
+                request = Request(APIRequestFactory().get("/", params))
+                expected = serializer_class(
+                    queryset.select_related("author", "category"),
+                    many=True,
+                    context={"request": request},
+                ).data
+                rows = PrayerRows(serializer_class, request)
+                actual = rows.render(rows.values(queryset))
+                self.assertEqual([dict(item) for item in expected], actual)
+                self.assertEqual(
+                    [list(item) for item in expected],
+                    [list(item) for item in actual],
+                )
+
+    def test_whitespace_only_name_falls_back_to_email(self):
+        request = Request(
+            APIRequestFactory().get("/", {"fields": "author_name"})
+        )
+        rows = PrayerRows(PrayerSerializer, request)
+        names = {
+            row["author_name"]
+            for row in rows.render(
+                rows.values(Prayer.objects.filter(is_anonymous=False))
+            )
+        }
+        self.assertIn("author4@example.com", names)
+        self.assertNotIn("\t", names)
+
+
+class FeedQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("user@example.com")
+        categories = [
+            PrayerCategory.objects.create(name=f"Category {i}")
+            for i in range(3)
+        ]
+        groups = [
+            Group.objects.create(name=f"Group {i}", created_by=cls.user)
+            for i in range(3)
+        ]
+        for group in groups:
+            GroupMembership.objects.create(user=cls.user, group=group)
+        authors = [create_user(f"author{i}@example.com") for i in range(5)]
+        for i in range(60):
+            prayer = Prayer.objects.create(
+                title=f"Prayer {i}",
+                content="Please pray.",
+                author=authors[i % len(authors)],
+                category=categories[i % len(categories)],
+                group=groups[i % len(groups)] if i % 2 else None,
+                privacy_level=(
+                    Prayer.PrivacyLevel.GROUP
+                    if i % 2
+                    else Prayer.PrivacyLevel.PUBLIC
+                ),
+            )
+            increment_prayer_count(prayer.pk)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_page(self, page_size):
+        response = self.client.get(
+            "/api/v1/prayers/", {"page_size": page_size}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), page_size)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        with CaptureQueriesContext(connection) as small_page:
+            self.get_page(5)
+        cache.clear()
+        with self.assertNumQueries(len(small_page)):
+            self.get_page(50)
+
+
+class FeedConditionalGetTests(TestCase):
+    url = "/api/v1/prayers/"
+
+    def setUp(self):
+        self.user = create_user("user@example.com")
+        self.group = Group.objects.create(name="Group", created_by=self.user)
+        self.membership = GroupMembership.objects.create(
+            user=self.user, group=self.group
+        )
+        self.prayer = Prayer.objects.create(
+            title="Prayer", content="Please pray.", author=self.user
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def etag(self, url=None):
+        response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        return response["ETag"]
+
+    def test_unchanged_feed_is_not_modified(self):
+        for url in [self.url, f"/api/v1/groups/{self.group.pk}/prayers/"]:
+            etag = self.etag(url)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_changes_the_user_cannot_see_keep_the_etag(self):
+        other = create_user("other@example.com")
+        private = Prayer.objects.create(
+            title="Private",
+            content="Please pray.",
+            author=other,
+            privacy_level=Prayer.PrivacyLevel.PRIVATE,
+        )
+        other_group = Group.objects.create(name="Other", created_by=other)
+        etag = self.etag()
+        changes = [
+            lambda: increment_prayer_count(private.pk),
+            lambda: Prayer.objects.create(
+                title="Group",
+                content="Please pray.",
+                author=other,
+                group=other_group,
+                privacy_level=Prayer.PrivacyLevel.GROUP,
+            ),
+            lambda: GroupMembership.objects.create(
+                user=other, group=other_group
+            ),
+            lambda: private.delete(),
+        ]
+        for change in changes:
+            change()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_changes_without_updated_at_change_the_etag(self):
+        changes = [
+            lambda: increment_prayer_count(self.prayer.pk),
+            lambda: self.membership.delete(),
+            lambda: self.prayer.delete(),
+        ]
+        etag = self.etag()
+        for change in changes:
+            change()
+            new_etag = self.etag()
+            self.assertNotEqual(new_etag, etag)
+            etag = new_etag
+
+
+class SyncTests(TestCase):
+    url = "/api/v1/prayers/sync/"
+
+    def setUp(self):
+        self.user = create_user("user@example.com")
+        self.author = create_user("author@example.com")
+        self.group = Group.objects.create(name="G", created_by=self.author)
+        self.other_group = Group.objects.create(
+            name="G2", created_by=self.author
+        )
+        GroupMembership.objects.create(user=self.author, group=self.group)
+        GroupMembership.objects.create(
+            user=self.author, group=self.other_group
+        )
+        self.membership = GroupMembership.objects.create(
+            user=self.user, group=self.group
+        )
+        self.public = self.create_prayer(Prayer.PrivacyLevel.PUBLIC)
+        self.group_prayer = self.create_prayer(
+            Prayer.PrivacyLevel.GROUP, self.group
+        )
+        self.other_group_prayer = self.create_prayer(
+            Prayer.PrivacyLevel.GROUP, self.other_group
+        )
+        # Everything above happened well before the first sync
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Prayer.objects.update(updated_at=an_hour_ago)
+        MembershipChange.objects.update(changed_at=an_hour_ago)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        first = self.sync(timezone.now() - timedelta(minutes=30))
+        self.assertEqual(first["changed"], [])
+        self.token = first["sync_token"]
+
+    def create_prayer(self, privacy_level, group=None):
+        return Prayer.objects.create(
+            title="Prayer",
+            content="Please pray.",
+            author=self.author,
+            group=group,
+            privacy_level=privacy_level,
+        )
+
+    def sync(self, since=None):
+        if since is None:
+            since = self.token
+        elif not isinstance(since, str):
+            since = since.isoformat()
+        response = self.client.get(self.url, {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assert_sync(self, changed=(), removed=()):
+        data = self.sync()
+        self.assertEqual(
+            sorted(item["id"] for item in data["changed"]),
+            sorted(prayer.pk for prayer in changed),
+        )
+        self.assertEqual(data["removed"], sorted(p.pk for p in removed))
+
+    def test_nothing_changed(self):
+        self.assert_sync()
+
+    def test_created(self):
+        prayer = self.create_prayer(Prayer.PrivacyLevel.PUBLIC)
+        self.create_prayer(Prayer.PrivacyLevel.PRIVATE)
+        self.assert_sync(changed=[prayer])
+
+    def test_updated(self):
+        self.group_prayer.title = "Updated"
+        self.group_prayer.save()
+        self.assert_sync(changed=[self.group_prayer])
+
+    def test_deleted(self):
+        removed = Prayer(pk=self.public.pk)
+        self.public.delete()
+        self.assert_sync(removed=[removed])
+
+    def test_privacy_change(self):
+        self.public.privacy_level = Prayer.PrivacyLevel.PRIVATE
+        self.public.save()
+        self.assert_sync(removed=[self.public])
+
+    def test_join_returns_the_groups_older_prayers(self):
+        GroupMembership.objects.create(user=self.user, group=self.other_group)
+        self.assert_sync(changed=[self.other_group_prayer])
+
+    def test_leave_removes_the_groups_prayers(self):
+        self.membership.delete()
+        self.assert_sync(removed=[self.group_prayer])
+
+    def test_join_and_leave(self):
+        GroupMembership.objects.create(user=self.user, group=self.other_group)
+        self.membership.delete()
+        self.assert_sync(
+            changed=[self.other_group_prayer], removed=[self.group_prayer]
+        )
+
+    def test_leave_and_rejoin(self):
+        self.membership.delete()
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        self.assert_sync(changed=[self.group_prayer])
+
+    def test_join_of_a_large_group_expires_the_token(self):
+        for _i in range(3):
+            self.create_prayer(Prayer.PrivacyLevel.GROUP, self.other_group)
+        Prayer.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        GroupMembership.objects.create(user=self.user, group=self.other_group)
+        with mock.patch("apps.prayer.views.SYNC_PAGE_SIZE", 2):
+            response = self.client.get(self.url, {"since": self.token})
+        self.assertEqual(response.status_code, 410)
+
+
+class PrayerSearchTests(TestCase):
+    url = "/api/v1/prayers/search/"
+
+    def setUp(self):
+        self.user = create_user("user@example.com")
+        self.author = create_user("author@example.com")
+        self.group = Group.objects.create(name="G", created_by=self.author)
+        self.other_group = Group.objects.create(
+            name="G2", created_by=self.author
+        )
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        self.public = self.create_prayer(
+            "Healing", "For my mother's healing.", Prayer.PrivacyLevel.PUBLIC
+        )
+        self.own = self.create_prayer(
+            "Exams", "Healing from stress.", author=self.user
+        )
+        self.group_prayer = self.create_prayer(
+            "Healing", "Group.", Prayer.PrivacyLevel.GROUP, self.group
+        )
+        self.create_prayer("Healing", "Someone else's private prayer.")
+        self.create_prayer(
+            "Healing",
+            "Other group.",
+            Prayer.PrivacyLevel.GROUP,
+            self.other_group,
+        )
+        self.create_prayer(
+            "Travel", "Safe travels.", Prayer.PrivacyLevel.PUBLIC
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_prayer(
+        self,
+        title,
+        content,
+        privacy_level=Prayer.PrivacyLevel.PRIVATE,
+        group=None,
+        author=None,
+    ):
+        return Prayer.objects.create(
+            title=title,
+            content=content,
+            author=author or self.author,
+            privacy_level=privacy_level,
+            group=group,
+        )
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.json()["results"]]
+
+    def test_q_is_required(self):
+        for params in ({}, {"q": "  "}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_only_visible_prayers_match(self):
+        self.assertCountEqual(
+            self.search(q="healing"),
+            [self.public.pk, self.own.pk, self.group_prayer.pk],
+        )
+
+    def test_filters_apply_to_the_results(self):
+        self.assertCountEqual(
+            self.search(q="healing", group=self.group.pk),
+            [self.group_prayer.pk],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "needs tsvector")
+    def test_title_matches_rank_first(self):
+        results = self.search(q="healing")
+        self.assertEqual(results[-1], self.own.pk)
+
+    def test_admin_search_uses_search_prayers(self):
+        model_admin = admin.site._registry[Prayer]
+        request = APIRequestFactory().get("/admin/prayer/prayer/")
+        queryset, may_have_duplicates = model_admin.get_search_results(
+            request, Prayer.objects.all(), "travel"
+        )
+        self.assertFalse(may_have_duplicates)
+        self.assertEqual(
+            list(queryset.values_list("title", flat=True)), ["Travel"]
+        )
+        queryset, _ = model_admin.get_search_results(
+            request, Prayer.objects.all(), ""
+        )
+        self.assertEqual(queryset.count(), Prayer.objects.count())
+
+
+@override_settings(
+    FEED_MATERIALIZATION_ENABLED=True, BACKGROUND_TASKS_EAGER=True
+)
+class BulkCreatePrayersTests(TestCase):
+    url = "/api/v1/prayers/bulk/"
+
+    def setUp(self):
+        self.user = create_user("user@example.com")
+        self.member = create_user("member@example.com")
+        self.private_group = Group.objects.create(
+            name="Private", created_by=self.user
+        )
+        self.public_group = Group.objects.create(
+            name="Public", created_by=self.user, is_private=False
+        )
+        for group in (self.private_group, self.public_group):
+            GroupMembership.objects.create(user=self.user, group=group)
+            GroupMembership.objects.create(user=self.member, group=group)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def item(self, title="Prayer", **fields):
+        return {"title": title, "content": "Please pray.", **fields}
+
+    def post(self, items, url=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url or self.url, items, format="json")
+
+    def created(self, response):
+        self.assertEqual(response.status_code, 201)
+        return list(
+            Prayer.objects.filter(
+                pk__in=[item["id"] for item in response.json()]
+            ).order_by("pk")
+        )
+
+    def group_url(self, group):
+        return f"/api/v1/groups/{group.pk}/prayers/bulk/"
+
+    def test_invalid_items_create_nothing(self):
+        response = self.post(
+            [self.item("First"), self.item(""), self.item("Third")]
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(errors[0], {})
+        self.assertIn("title", errors[1])
+        self.assertEqual(errors[2], {})
+        self.assertFalse(Prayer.objects.exists())
+
+    def test_item_limit(self):
+        with mock.patch("apps.prayer.views.BULK_CREATE_MAX_ITEMS", 2):
+            response = self.post([self.item()] * 3)
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(Prayer.objects.exists())
+            self.assertEqual(
+                len(self.created(self.post([self.item()] * 2))), 2
+            )
+
+    def test_privacy_levels_match_single_creates(self):
+        prayers = self.created(
+            self.post(
+                [
+                    self.item("No group"),
+                    self.item("Private", group=self.private_group.pk),
+                    self.item("Public", group=self.public_group.pk),
+                ]
+            )
+        )
+        self.assertEqual(
+            [(prayer.author, prayer.privacy_level) for prayer in prayers],
+            [
+                (self.user, Prayer.PrivacyLevel.PRIVATE),
+                (self.user, Prayer.PrivacyLevel.GROUP),
+                (self.user, Prayer.PrivacyLevel.PRIVATE),
+            ],
+        )
+
+    def test_group_bulk_sets_the_group_and_privacy_level(self):
+        for group, privacy_level in (
+            (self.private_group, Prayer.PrivacyLevel.GROUP),
+            (self.public_group, Prayer.PrivacyLevel.PUBLIC),
+        ):
+            with self.subTest(group=group.name):
+                prayers = self.created(
+                    self.post(
+                        [self.item(), self.item(group=None)],
+                        self.group_url(group),
+                    )
+                )
+                for prayer in prayers:
+                    self.assertEqual(prayer.group, group)
+                    self.assertEqual(prayer.privacy_level, privacy_level)
+
+    def test_search_vectors_are_updated(self):
+        with mock.patch(
+            "apps.prayer.serializers.update_search_vectors"
+        ) as update:
+            prayers = self.created(self.post([self.item(), self.item()]))
+        update.assert_called_once()
+        self.assertCountEqual(update.call_args.args[0], prayers)
+
+    def test_group_prayers_are_fanned_out(self):
+        prayers = self.created(
+            self.post([self.item()] * 2, self.group_url(self.private_group))
+        )
+        self.assertCountEqual(
+            FeedEntry.objects.filter(user=self.member).values_list(
+                "prayer_id", flat=True
+            ),
+            [prayer.pk for prayer in prayers],
+        )
+
+    def test_group_prayers_are_announced(self):
+        with mock.patch("apps.prayer.realtime._publish") as announce:
+            prayers = self.created(
+                self.post(
+                    [self.item()] * 2, self.group_url(self.private_group)
+                )
+            )
+        self.assertEqual(
+            announce.call_args_list,
+            [
+                mock.call(
+                    group_channel(self.private_group.pk),
+                    "prayer.created",
+                    prayer=prayer.pk,
+                    group=self.private_group.pk,
+                )
+                for prayer in prayers
+            ],
+        )
+
+
+class MembershipRequestBatchTests(TestCase):
+    url = "/api/v1/membership-requests/batch/"
+
+    def setUp(self):
+        self.admin = create_user("admin@example.com")
+        self.group = Group.objects.create(name="Group", created_by=self.admin)
+        self.other_group = Group.objects.create(
+            name="Other", created_by=self.admin
+        )
+        GroupMembership.objects.create(
+            user=self.admin,
+            group=self.group,
+            role=GroupMembership.Role.ADMIN,
+        )
+        GroupMembership.objects.create(
+            user=self.admin,
+            group=self.other_group,
+            role=GroupMembership.Role.MEMBER,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.users = 0
+
+    def create_request(self, group=None, **kwargs):
+        self.users += 1
+        user = create_user(f"user{self.users}@example.com")
+        return MembershipRequest.objects.create(
+            user=user, group=group or self.group, **kwargs
+        )
+
+    def post(self, requests, action="approve"):
+        ids = [req.pk for req in requests]
+        response = self.client.post(
+            self.url, {"ids": ids, "action": action}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_only_pending_requests_of_admin_groups_are_processed(self):
+        pending = self.create_request()
+        not_admin = self.create_request(self.other_group)
+        rejected = self.create_request(
+            status=MembershipRequest.Status.REJECTED
+        )
+        result = self.post([pending, not_admin, rejected])
+        self.assertEqual(result["processed"], [pending.pk])
+        self.assertEqual(result["skipped"], [not_admin.pk, rejected.pk])
+        self.assertEqual(
+            set(GroupMembership.objects.values_list("user_id", flat=True)),
+            {self.admin.pk, pending.user_id},
+        )
+        not_admin.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertEqual(not_admin.status, MembershipRequest.Status.PENDING)
+        self.assertEqual(rejected.status, MembershipRequest.Status.REJECTED)
+
+    def test_reject_creates_no_memberships(self):
+        req = self.create_request()
+        self.assertEqual(self.post([req], "reject")["processed"], [req.pk])
+        req.refresh_from_db()
+        self.assertEqual(req.status, MembershipRequest.Status.REJECTED)
+        self.assertFalse(GroupMembership.objects.filter(user=req.user))
+
+    def test_existing_memberships_are_kept(self):
+        req = self.create_request()
+        GroupMembership.objects.create(
+            user=req.user,
+            group=self.group,
+            role=GroupMembership.Role.MODERATOR,
+        )
+        self.assertEqual(self.post([req])["processed"], [req.pk])
+        membership = GroupMembership.objects.get(user=req.user)
+        self.assertEqual(membership.role, GroupMembership.Role.MODERATOR)
+        req.refresh_from_db()
+        self.assertEqual(req.status, MembershipRequest.Status.APPROVED)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).member_count, 2)
+
+    def test_member_count_after_approval(self):
+        self.post([self.create_request() for _i in range(3)])
+        self.assertEqual(Group.objects.get(pk=self.group.pk).member_count, 4)
+        self.assertEqual(
+            MembershipChange.objects.filter(
+                kind=MembershipChange.Kind.JOINED
+            ).count(),
+            GroupMembership.objects.count(),
+        )
+
+    def test_query_count_does_not_grow_with_the_ids(self):
+        def queries(count):
+            requests = [self.create_request() for _i in range(count)]
+            with CaptureQueriesContext(connection) as captured:
+                self.post(requests)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(10))
+
+
+class GroupMemberCountTests(TestCase):
+    def setUp(self):
+        self.admin = create_user("admin@example.com")
+        self.user = create_user("user@example.com")
+        self.group = Group.objects.create(
+            name="Group", created_by=self.admin, is_private=False
+        )
+        GroupMembership.objects.create(
+            user=self.admin,
+            group=self.group,
+            role=GroupMembership.Role.ADMIN,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def member_count(self, group=None):
+        return Group.objects.get(pk=(group or self.group).pk).member_count
+
+    def test_join_counts_the_member(self):
+        response = self.client.post(f"/api/v1/groups/{self.group.pk}/join/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.member_count(), 2)
+
+    def test_approve_counts_the_member(self):
+        Group.objects.filter(pk=self.group.pk).update(is_private=True)
+        request = MembershipRequest.objects.create(
+            user=self.user, group=self.group
+        )
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(
+            f"/api/v1/membership-requests/{request.pk}/approve/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.member_count(), 2)
+
+    def test_delete_uncounts_the_member(self):
+        membership = GroupMembership.objects.create(
+            user=self.user, group=self.group
+        )
+        membership.delete()
+        self.assertEqual(self.member_count(), 1)
+
+    def test_deleting_a_user_uncounts_their_memberships(self):
+        other = Group.objects.create(name="Other", created_by=self.admin)
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        GroupMembership.objects.create(user=self.user, group=other)
+        self.user.delete()
+        self.assertEqual(self.member_count(), 1)
+        self.assertEqual(self.member_count(other), 0)
+
+    def test_deleting_a_group_deletes_its_memberships(self):
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        self.group.delete()
+        self.assertFalse(GroupMembership.objects.exists())
+
+    def test_saving_a_stale_group_keeps_the_count(self):
+        stale = Group.objects.get(pk=self.group.pk)
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        stale.name = "Renamed"
+        stale.save()
+        group = Group.objects.get(pk=self.group.pk)
+        self.assertEqual(group.name, "Renamed")
+        self.assertEqual(group.member_count, 2)
+
+    def test_recompute_member_counts_repairs_drift(self):
+        empty = Group.objects.create(name="Empty", created_by=self.admin)
+        Group.objects.update(member_count=7)
+        out = io.StringIO()
+        call_command("recompute_member_counts", "--dry-run", stdout=out)
+        self.assertIn("2 groups have a wrong count", out.getvalue())
+        self.assertEqual(self.member_count(), 7)
+
+        out = io.StringIO()
+        call_command("recompute_member_counts", stdout=out)
+        self.assertIn("Repaired member_count for 2 groups", out.getvalue())
+        self.assertEqual(self.member_count(), 1)
+        self.assertEqual(self.member_count(empty), 0)
+
+
+@override_settings(PRAYER_COUNT_SHARDS=4)
+class ConcurrentPrayerCountTests(TransactionTestCase):
+    threads = 16
+
+    def test_concurrent_increments_are_not_lost(self):
+        author = create_user("author@example.com")
+        prayer = Prayer.objects.create(
+            title="Prayer", content="Please pray.", author=author
+        )
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def tap():
+            try:
+                barrier.wait()
+                increment_prayer_count(prayer.pk)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=tap) for _ in range(self.threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        call_command("flush_prayer_counts", stdout=io.StringIO())
+        prayer.refresh_from_db()
+        self.assertEqual(prayer.prayer_count, self.threads)
+        self.assertEqual(prayer.total_prayer_count, self.threads)
+
+
+@override_settings(PRAYER_COUNT_SHARDS=4)
+class FlushPrayerCountsTests(TestCase):
+    def setUp(self):
+        author = create_user("author@example.com")
+        self.prayers = [
+            Prayer.objects.create(
+                title=f"Prayer {i}", content="Please pray.", author=author
+            )
+            for i in range(5)
+        ]
+        for i, prayer in enumerate(self.prayers):
+            for _tap in range(i + 1):
+                increment_prayer_count(prayer.pk)
+
+    def test_counts_are_folded_into_the_prayers(self):
+        self.assertEqual(flush_prayer_counts(), 5)
+        for i, prayer in enumerate(self.prayers):
+            prayer.refresh_from_db()
+            self.assertEqual(prayer.prayer_count, i + 1)
+            self.assertEqual(prayer.total_prayer_count, i + 1)
+        self.assertFalse(PrayerCountShard.objects.filter(count__gt=0).exists())
+        self.assertEqual(flush_prayer_counts(), 0)
+
+    def test_queries_are_per_batch_not_per_shard(self):
+        with mock.patch("apps.prayer.counters.FLUSH_BATCH_SIZE", 2):
+            with CaptureQueriesContext(connection) as queries:
+                flush_prayer_counts()
+        # A shard UPDATE and a prayer UPDATE for each of the three batches
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 6)
+
+
+@override_settings(REALTIME_REDIS="")
+class RealtimeAccessTests(TransactionTestCase):
+    def setUp(self):
+        self.user = create_user("member@example.com")
+        self.group = Group.objects.create(name="Group", created_by=self.user)
+        self.membership = GroupMembership.objects.create(
+            user=self.user, group=self.group
+        )
+        self.prayer = Prayer.objects.create(
+            title="Prayer",
+            content="Please pray.",
+            author=create_user("author@example.com"),
+            group=self.group,
+            privacy_level=Prayer.PrivacyLevel.GROUP,
+        )
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user)
+        self.token = str(token.access_token)
+
+    async def connect(self, *channels):
+        self.inbox, self.outbox = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            "type": "websocket",
+            "path": "/ws/",
+            "query_string": f"token={self.token}".encode(),
+        }
+        self.app = asyncio.create_task(
+            websocket_application(scope, self.inbox.get, self.outbox.put)
+        )
+        await self.inbox.put({"type": "websocket.connect"})
+        self.assertEqual((await self.receive())["type"], "websocket.accept")
+        await self.inbox.put(
+            {
+                "type": "websocket.receive",
+                "text": json.dumps(
+                    {"action": "subscribe", "channels": list(channels)}
+                ),
+            }
+        )
+        subscribed = await self.receive_json()
+        self.assertEqual(subscribed["channels"], sorted(channels))
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outbox.get(), 5)
+
+    async def receive_json(self):
+        return json.loads((await self.receive())["text"])
+
+    async def disconnect(self):
+        await self.inbox.put({"type": "websocket.disconnect"})
+        await self.app
+
+    async def test_leaving_a_group_revokes_its_channels(self):
+        channels = [
+            group_channel(self.group.pk),
+            prayer_channel(self.prayer.pk),
+        ]
+        await self.connect(*channels)
+
+        await database_sync_to_async(self.membership.delete)()
+        self.assertEqual(
+            await self.receive_json(),
+            {"event": "revoked", "channels": sorted(channels)},
+        )
+        for channel in channels:
+            publish(channel, json.dumps({"event": "prayer.created"}))
+        await self.disconnect()
+        self.assertTrue(self.outbox.empty())
+
+    async def test_private_prayer_revokes_its_channel(self):
+        channel = prayer_channel(self.prayer.pk)
+        await self.connect(channel)
+        self.prayer.privacy_level = Prayer.PrivacyLevel.PRIVATE
+        await database_sync_to_async(self.prayer.save)()
+
+        self.assertEqual(
+            await self.receive_json(),
+            {"event": "revoked", "channels": [channel]},
+        )
+        await self.disconnect()
+
+
+def async_urlconf():
+    """The prayer and group routes with async dispatch, as under ASGI."""
+    with override_settings(ASYNC_VIEWS_ENABLED=True):
+        router = DefaultRouter()
+        router.register(r"prayers", PrayerViewSet, basename="prayer")
+        router.register(r"groups", GroupViewSet, basename="group")
+        # The views are built when the URLs are first read
+        urlpatterns = [path("api/v1/", include(router.urls))]
+    return type("URLConf", (), {"urlpatterns": urlpatterns})
+
+
+class AsyncViewsTests(TestCase):
+    urls = async_urlconf()
+
+    def setUp(self):
+        self.user = create_user("user@example.com")
+        author = create_user("author@example.com")
+        self.group = Group.objects.create(name="Group", created_by=author)
+        GroupMembership.objects.create(user=self.user, group=self.group)
+        self.prayers = [
+            Prayer.objects.create(
+                title=f"Prayer {i}",
+                content="Please pray. " * 20,
+                author=author,
+                group=self.group,
+                privacy_level=Prayer.PrivacyLevel.GROUP,
+            )
+            for i in range(3)
+        ]
+        self.prayers.append(
+            Prayer.objects.create(
+                title="Own", content="Please pray.", author=self.user
+            )
+        )
+        self.hidden = Prayer.objects.create(
+            title="Hidden",
+            content="Please pray.",
+            author=author,
+            privacy_level=Prayer.PrivacyLevel.PRIVATE,
+        )
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user)
+        self.headers = {"Authorization": f"Bearer {token.access_token}"}
+
+    async def get_both(self, url, params=None):
+        """The response of the sync view and of its async variant."""
+        sync_response = await sync_to_async(self.client.get)(
+            url, params, headers=self.headers
+        )
+        with self.settings(ROOT_URLCONF=self.urls):
+            async_response = await AsyncClient().get(
+                url, params, headers=self.headers
+            )
+        return sync_response, async_response
+
+    async def assert_same(self, url, params=None):
+        sync_response, async_response = await self.get_both(url, params)
+        self.assertEqual(sync_response.status_code, 200)
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.json(), sync_response.json())
+        return sync_response, async_response
+
+    def test_views_are_async(self):
+        for url in ("/api/v1/prayers/", "/api/v1/prayers/1/pray/"):
+            with self.subTest(url=url):
+                view = resolve(url, self.urls).func
+                self.assertTrue(iscoroutinefunction(view))
+                self.assertFalse(iscoroutinefunction(resolve(url).func))
+
+    async def test_list_matches_the_sync_view(self):
+        for fast_path in (True, False):
+            for params in (
+                {},
+                {"summary": "true"},
+                {"fields": "id,title"},
+                {"page_size": 2},
+            ):
+                with self.subTest(fast_path=fast_path, params=params):
+                    with self.settings(PRAYER_LIST_FAST_PATH=fast_path):
+                        sync_response, async_response = await self.assert_same(
+                            "/api/v1/prayers/", params
+                        )
+                    self.assertEqual(
+                        async_response["ETag"], sync_response["ETag"]
+                    )
+
+    async def test_list_is_not_modified_for_the_sync_etag(self):
+        sync_response, _ = await self.get_both("/api/v1/prayers/")
+        with self.settings(ROOT_URLCONF=self.urls):
+            response = await AsyncClient().get(
+                "/api/v1/prayers/",
+                headers={
+                    **self.headers,
+                    "If-None-Match": sync_response["ETag"],
+                },
+            )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_group_list_matches_the_sync_view(self):
+        await self.assert_same("/api/v1/groups/")
+
+    async def test_pray_matches_the_sync_view(self):
+        prayer = self.prayers[0]
+        url = f"/api/v1/prayers/{prayer.pk}/pray/"
+        sync_response = await sync_to_async(self.client.post)(
+            url, headers=self.headers
+        )
+        with self.settings(ROOT_URLCONF=self.urls):
+            async_response = await AsyncClient().post(
+                url, headers=self.headers
+            )
+        self.assertEqual(async_response.status_code, 200)
+        self.assertEqual(async_response.json(), sync_response.json())
+        total = await PrayerCountShard.objects.filter(
+            prayer=prayer
+        ).aaggregate(total=Sum("count"))
+        self.assertEqual(total["total"], 2)
+
+    async def test_pray_is_not_found_for_invisible_or_invalid_pks(self):
+        for pk in (self.hidden.pk, "abc", 0):
+            with self.subTest(pk=pk):
+                with self.settings(ROOT_URLCONF=self.urls):
+                    response = await AsyncClient().post(
+                        f"/api/v1/prayers/{pk}/pray/", headers=self.headers
+                    )
+                self.assertEqual(response.status_code, 404)
+        self.assertFalse(await PrayerCountShard.objects.aexists())
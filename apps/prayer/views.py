@@ -1,31 +1,241 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404  # noqa: F401
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Exists, OuterRef
+from django.db import transaction
+from django.db.models import (
+    Q,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Substr
 from .models import (
+    MembershipChange,
     Prayer,
     PrayerCategory,
+    PrayerCountShard,
+    PrayerTombstone,
     Group,
     GroupMembership,
     MembershipRequest,
 )
 from apps.prayer.serializers import (
     PrayerSerializer,
+    PrayerSummarySerializer,
     PrayerCategorySerializer,
     GroupSerializer,
     MembershipRequestSerializer,
+    MembershipRequestBatchSerializer,
+)
+from .counters import (
+    aincrement_prayer_count,
+    increment_prayer_count,
+    with_prayer_counts,
+)
+from .filters import PrayerFilterBackend
+from .memberships import (
+    aget_membership_roles,
+    approve_requests,
+    get_membership_roles,
+    reject_requests,
 )
 from .permissions import IsGroupAdmin
+from .realtime import publish_prayer_count
+from .rows import PrayerRows
+from .search import search_prayers
+from .sync import InvalidSyncToken, SyncTokenExpired, changes_since
+from .visibility import avisible_prayers, visible_prayers
+from apps.common.cache import cached_as
+from apps.common.conditional import aconditional_get, conditional_get
+from apps.common.pagination import (
+    PrayerCursorPagination,
+    PrayerSearchPagination,
+)
+from apps.common.querysets import optimize_for_serializer
+from apps.common.serializers import selected_fields
+from apps.common.views import AsyncViewSetMixin, ReplicaReadMixin
+from apps.users.models import User
+
+
+# Maximum number of changed prayers returned by one sync call
+SYNC_PAGE_SIZE = 500
+
+# Maximum number of prayers accepted by one bulk create call
+BULK_CREATE_MAX_ITEMS = 500
+
+# Length of the content preview in the ?summary=true representation
+SUMMARY_CONTENT_LENGTH = 140
+
+
+def _latest(queryset, field):
+    """The newest value of an indexed field, as a subquery."""
+    return Subquery(queryset.order_by(f"-{field}").values(field)[:1])
+
+
+def _feed_markers(user):
+    """
+    One row of monotonic markers covering every change that can alter
+    the user's prayer lists, each restricted to prayers the user can
+    see: the newest save and tap of public, own and group prayers, the
+    newest tombstone (deletes and visibility changes) among them and the
+    user's newest membership change. Each is an index lookup, so a poll
+    costs far less than serving the page, and changes to prayers the
+    user cannot see leave the version alone.
+    """
+    group_ids = GroupMembership.objects.filter(user_id=user.pk).values(
+        "group_id"
+    )
+    branches = {
+        "public": Q(privacy_level=Prayer.PrivacyLevel.PUBLIC),
+        "own": Q(author_id=user.pk),
+        "group": Q(
+            privacy_level=Prayer.PrivacyLevel.GROUP, group_id__in=group_ids
+        ),
+    }
+    markers = {}
+    for name, condition in branches.items():
+        prayers = Prayer.objects.filter(condition)
+        markers[f"{name}_prayer"] = _latest(prayers, "updated_at")
+        markers[f"{name}_prayed"] = _latest(
+            PrayerCountShard.objects.filter(prayer__in=prayers.values("pk")),
+            "updated_at",
+        )
+    tombstones = PrayerTombstone.objects.filter(
+        branches["public"] | branches["own"] | branches["group"]
+    )
+    markers["tombstone"] = _latest(tombstones, "pk")
+    markers["membership"] = _latest(
+        MembershipChange.objects.filter(user_id=user.pk), "pk"
+    )
+    return User.objects.filter(pk=user.pk).values(**markers)
+
+
+def _feed_version(user):
+    """
+    Cheap version of the user's prayer lists for conditional GET. Only
+    an ETag is derived from it: leaving a group has no timestamp, so no
+    Last-Modified could cover every change.
+    """
+    return tuple(_feed_markers(user).get().values())
+
+
+async def _afeed_version(user):
+    """_feed_version() with the async ORM."""
+    return tuple((await _feed_markers(user).aget()).values())
+
+
+def _prayer_serializer_class(request):
+    """PrayerSummarySerializer for GET ?summary=true, else PrayerSerializer."""
+    if request.method == "GET" and request.query_params.get("summary") in (
+        "1",
+        "true",
+    ):
+        return PrayerSummarySerializer
+    return PrayerSerializer
+
+
+def _optimize_prayers(queryset, request, serializer_class):
+    """
+    Loads only the columns serializer_class renders for the fieldset
+    asked for with ?fields= / ?omit=. The summary preview is cut in SQL.
+    """
+    if serializer_class is PrayerSummarySerializer:
+        queryset = queryset.annotate(
+            content_summary=Substr("content", 1, SUMMARY_CONTENT_LENGTH)
+        )
+    fields = selected_fields(request, serializer_class.Meta.fields)
+    # Read by the cursor pagination and the sync token, even if not rendered
+    fields += ["created_at", "updated_at"]
+    return optimize_for_serializer(queryset, serializer_class, fields)
+
 
+def _paginated_prayers(request, queryset, serializer_class, paginator, view):
+    """
+    One page of a prayer list. With PRAYER_LIST_FAST_PATH the page is
+    fetched as .values() rows and rendered without the serializer,
+    see apps/prayer/rows.py.
+    """
+    if settings.PRAYER_LIST_FAST_PATH:
+        rows = PrayerRows(serializer_class, request)
+        page = paginator.paginate_queryset(
+            rows.values(queryset), request, view=view
+        )
+        return paginator.get_paginated_response(rows.render(page))
+    page = paginator.paginate_queryset(queryset, request, view=view)
+    serializer = serializer_class(
+        page, many=True, context={"request": request}
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+
+async def _apaginated_prayers(request, queryset, serializer_class, view):
+    """_paginated_prayers() for async views, with PrayerCursorPagination."""
+    paginator = PrayerCursorPagination()
+    if settings.PRAYER_LIST_FAST_PATH:
+        rows = PrayerRows(serializer_class, request)
+        page = await paginator.apaginate_queryset(
+            rows.values(queryset), request, view=view
+        )
+        return paginator.get_paginated_response(rows.render(page))
+    page = await paginator.apaginate_queryset(queryset, request, view=view)
+    serializer = serializer_class(
+        page, many=True, context={"request": request}
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _privacy_level(group):
+    """Privacy level of a prayer created through /prayers/."""
+    if group and group.is_private:
+        return Prayer.PrivacyLevel.GROUP
+    return Prayer.PrivacyLevel.PRIVATE
+
+
+def _group_privacy_level(group):
+    """Privacy level of a prayer created through /groups/{id}/prayers/."""
+    if group.is_private:
+        return Prayer.PrivacyLevel.GROUP
+    return Prayer.PrivacyLevel.PUBLIC
 
-class PrayerViewSet(viewsets.ModelViewSet):
+
+def _bulk_create_prayers(request, privacy_level, **save_kwargs):
+    """
+    Validates a list of prayers and inserts them with one bulk_create()
+    in one transaction. If any item is invalid nothing is created and
+    the response lists the errors per item, in request order.
+    """
+    serializer = PrayerSerializer(
+        data=request.data,
+        many=True,
+        max_length=BULK_CREATE_MAX_ITEMS,
+        context={"request": request},
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    for attrs in serializer.validated_data:
+        group = save_kwargs.get("group", attrs.get("group"))
+        attrs["privacy_level"] = privacy_level(group)
+    with transaction.atomic():
+        serializer.save(author=request.user, **save_kwargs)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class PrayerViewSet(
+    ReplicaReadMixin, AsyncViewSetMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing Prayer objects.
     """
 
     serializer_class = PrayerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PrayerCursorPagination
+    filter_backends = [PrayerFilterBackend]
 
     def get_permissions(self):
         """
@@ -49,12 +259,53 @@ class PrayerViewSet(viewsets.ModelViewSet):
         2) private prayers only to the author,
         3) group-level prayers only to group members.
         """
-        user = self.request.user
-        return Prayer.objects.filter(
-            Q(privacy_level=Prayer.PrivacyLevel.PUBLIC)
-            | Q(author=user)
-            | Q(privacy_level=Prayer.PrivacyLevel.GROUP, group__members=user)
-        ).distinct()
+        queryset = with_prayer_counts(visible_prayers(self.request.user))
+        return _optimize_prayers(
+            queryset, self.request, self.get_serializer_class()
+        )
+
+    async def aget_queryset(self):
+        """get_queryset() for async views."""
+        queryset = with_prayer_counts(
+            await avisible_prayers(self.request.user)
+        )
+        return _optimize_prayers(
+            queryset, self.request, self.get_serializer_class()
+        )
+
+    def get_serializer_class(self):
+        return _prayer_serializer_class(self.request)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Feed listing with an ETag validator,
+        so polling clients get 304 Not Modified when nothing changed.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return conditional_get(
+            request,
+            _feed_version(request.user),
+            None,
+            lambda: _paginated_prayers(
+                request,
+                queryset,
+                self.get_serializer_class(),
+                self.paginator,
+                self,
+            ),
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        """list() with the async ORM."""
+        queryset = self.filter_queryset(await self.aget_queryset())
+        return await aconditional_get(
+            request,
+            await _afeed_version(request.user),
+            None,
+            lambda: _apaginated_prayers(
+                request, queryset, self.get_serializer_class(), self
+            ),
+        )
 
     def perform_create(self, serializer):
         """
@@ -62,26 +313,107 @@ class PrayerViewSet(viewsets.ModelViewSet):
         If the prayer belongs to a private group, set privacy_level to GROUP.
         """
         group = serializer.validated_data.get("group")
-        privacy_level = Prayer.PrivacyLevel.PRIVATE
+        serializer.save(
+            author=self.request.user, privacy_level=_privacy_level(group)
+        )
 
-        if group and group.is_private:
-            privacy_level = Prayer.PrivacyLevel.GROUP
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        """
+        Create a list of prayers at once, e.g. an import after a service.
+        The author and privacy level are set as in perform_create.
+        """
+        return _bulk_create_prayers(request, _privacy_level)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Full-text search over the prayers the user can see,
+        best matches first: ?q=<words>.
+        """
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"detail": "The 'q' parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = search_prayers(queryset, text).order_by(
+            "-rank", "-created_at", "id"
+        )
+        return _paginated_prayers(
+            request,
+            queryset,
+            self.get_serializer_class(),
+            PrayerSearchPagination(),
+            self,
+        )
 
-        serializer.save(author=self.request.user, privacy_level=privacy_level)
+    @action(detail=False, methods=["get"])
+    def sync(self, request):
+        """
+        Delta sync: prayers created or updated since the sync token,
+        and ids of prayers that were deleted or left the user's view.
+        Pass the returned sync_token as ?since= on the next call; the
+        first call can use an ISO 8601 datetime instead.
+        """
+        since = request.query_params.get("since")
+        if not since:
+            return Response(
+                {"detail": "The 'since' parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            changed, removed, sync_token, has_more = changes_since(
+                request.user, since, self.get_queryset(), SYNC_PAGE_SIZE
+            )
+        except InvalidSyncToken:
+            return Response(
+                {"detail": "Invalid sync token."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except SyncTokenExpired:
+            return Response(
+                {"detail": "Sync token expired, fetch the full feed."},
+                status=status.HTTP_410_GONE,
+            )
+        serializer = self.get_serializer(changed, many=True)
+        return Response(
+            {
+                "changed": serializer.data,
+                "removed": removed,
+                "sync_token": sync_token,
+                "has_more": has_more,
+            }
+        )
 
     @action(detail=True, methods=["post"])
     def pray(self, request, pk=None):
         """
         A custom action to increment the 'prayer_count'
         when a user prays for this particular request.
+        The increment goes to a counter shard, see apps/prayer/counters.py.
         """
         prayer = self.get_object()
-        prayer.prayer_count += 1
-        prayer.save()
+        increment_prayer_count(prayer.pk)
+        publish_prayer_count(prayer.pk)
+        return Response({"status": "prayer counted"})
+
+    async def apray(self, request, pk=None):
+        """pray() with the async ORM."""
+        queryset = self.filter_queryset(await avisible_prayers(request.user))
+        try:
+            visible = await queryset.filter(pk=pk).aexists()
+        except (TypeError, ValueError):
+            visible = False
+        if not visible:
+            raise Http404
+        await aincrement_prayer_count(pk)
+        publish_prayer_count(pk)
         return Response({"status": "prayer counted"})
 
 
-class PrayerCategoryViewSet(viewsets.ModelViewSet):
+class PrayerCategoryViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for PrayerCategory model.
     """
@@ -89,6 +421,17 @@ class PrayerCategoryViewSet(viewsets.ModelViewSet):
     queryset = PrayerCategory.objects.all()
     serializer_class = PrayerCategorySerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        Categories are read on every screen and rarely change,
+        so the list goes through the query cache.
+        """
+        categories = cached_as(PrayerCategory, timeout=60 * 60)(
+            lambda: list(self.get_queryset())
+        )()
+        serializer = self.get_serializer(categories, many=True)
+        return Response(serializer.data)
+
     def get_permissions(self):
         """
         Only site administrators can create/update/delete categories.
@@ -99,7 +442,7 @@ class PrayerCategoryViewSet(viewsets.ModelViewSet):
         return [permissions.AllowAny()]
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(ReplicaReadMixin, AsyncViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing groups.
     Also contains actions for listing/creating prayers in a specific group.
@@ -127,31 +470,68 @@ class GroupViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """
-        Returns all groups with an additional field indicating
-        whether the user is a member of each group.
+        Returns all groups with an additional field holding the status
+        of the user's latest membership request.
+        Membership itself comes from the request's membership roles.
         """
         user = self.request.user
+        latest_request_status = (
+            MembershipRequest.objects.filter(group=OuterRef("pk"), user=user)
+            .order_by("-created_at")
+            .values("status")[:1]
+        )
         groups = Group.objects.all().annotate(
-            is_member=Exists(
-                GroupMembership.objects.filter(
-                    group=OuterRef("pk"),
-                    user=user,
-                )
-            )
+            user_membership_status=Coalesce(
+                Subquery(latest_request_status), Value("no_request")
+            ),
         )
 
         return groups
 
+    def list(self, request, *args, **kwargs):
+        """
+        The group directory is cached per user and invalidated on changes
+        to groups or to the user's membership requests.
+        """
+        serializer = self.get_serializer(self._load_groups(), many=True)
+        return Response(serializer.data)
+
+    async def alist(self, request, *args, **kwargs):
+        """list() with the async ORM; the query cache is read in a thread."""
+        if settings.QUERY_CACHE_ENABLED:
+            groups = await sync_to_async(self._load_groups)()
+        else:
+            groups = [group async for group in self.get_queryset().aiterator()]
+        # Read by GroupSerializer.get_is_member
+        await aget_membership_roles(request)
+        serializer = self.get_serializer(groups, many=True)
+        return Response(serializer.data)
+
+    def _load_groups(self):
+        return cached_as(
+            Group,
+            MembershipRequest.objects.filter(user=self.request.user),
+            timeout=60 * 5,
+        )(lambda: list(self.get_queryset()))()
+
     def perform_create(self, serializer):
         """
         Upon group creation, the creator is automatically assigned as ADMIN.
         """
-        group = serializer.save(created_by=self.request.user)
-        GroupMembership.objects.create(
-            user=self.request.user,
-            group=group,
-            role=GroupMembership.Role.ADMIN,
-        )
+        with transaction.atomic():
+            group = serializer.save(created_by=self.request.user)
+            GroupMembership.objects.create(
+                user=self.request.user,
+                group=group,
+                role=GroupMembership.Role.ADMIN,
+            )
+        # The new group is not loaded through get_queryset,
+        # so fill in the annotated fields for the response
+        group.refresh_from_db(fields=["member_count"])
+        group.user_membership_status = "no_request"
+        get_membership_roles(self.request)[
+            group.pk
+        ] = GroupMembership.Role.ADMIN
 
     @action(detail=True, methods=["get", "post"], url_path="prayers")
     def prayers(self, request, pk=None):
@@ -163,35 +543,40 @@ class GroupViewSet(viewsets.ModelViewSet):
 
         if request.method == "GET":
             # Logic for returning a list of prayers
-            queryset = (
-                Prayer.objects.filter(group=group)
-                .filter(
-                    Q(privacy_level=Prayer.PrivacyLevel.PUBLIC)
-                    | Q(
-                        privacy_level=Prayer.PrivacyLevel.GROUP,
-                        group__members=request.user,
+            serializer_class = _prayer_serializer_class(request)
+            queryset = _optimize_prayers(
+                with_prayer_counts(
+                    visible_prayers(
+                        request.user, Prayer.objects.filter(group=group)
                     )
-                    | Q(author=request.user)
-                )
-                .distinct()
+                ),
+                request,
+                serializer_class,
+            )
+            queryset = PrayerFilterBackend().filter_queryset(
+                request, queryset, self
+            )
+            return conditional_get(
+                request,
+                _feed_version(request.user),
+                None,
+                lambda: _paginated_prayers(
+                    request,
+                    queryset,
+                    serializer_class,
+                    PrayerCursorPagination(),
+                    self,
+                ),
             )
-            serializer = PrayerSerializer(queryset, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
 
         elif request.method == "POST":
             # Logic for creating a prayer
             serializer = PrayerSerializer(data=request.data)
             if serializer.is_valid():
-
-                if group.is_private:
-                    privacy_level = Prayer.PrivacyLevel.GROUP
-                else:
-                    privacy_level = Prayer.PrivacyLevel.PUBLIC
-
                 serializer.save(
                     author=request.user,
                     group=group,
-                    privacy_level=privacy_level,
+                    privacy_level=_group_privacy_level(group),
                 )
                 return Response(
                     serializer.data, status=status.HTTP_201_CREATED
@@ -200,6 +585,15 @@ class GroupViewSet(viewsets.ModelViewSet):
                 serializer.errors, status=status.HTTP_400_BAD_REQUEST
             )
 
+    @action(detail=True, methods=["post"], url_path="prayers/bulk")
+    def bulk_prayers(self, request, pk=None):
+        """
+        Create a list of prayers in this group at once.
+        The author and privacy level are set as in the prayers action.
+        """
+        group = self.get_object()
+        return _bulk_create_prayers(request, _group_privacy_level, group=group)
+
     @action(detail=True, methods=["post"])
     def join(self, request, pk=None):
         """
@@ -207,7 +601,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         If it's a private group, return a message to send a request-join.
         """
         group = self.get_object()
-        if group.members.filter(id=request.user.id).exists():
+        if group.pk in get_membership_roles(request):
             return Response(
                 {"detail": "You are already a member of this group"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -220,10 +614,13 @@ class GroupViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Create GroupMembership
-        GroupMembership.objects.create(
-            user=request.user, group=group, role=GroupMembership.Role.MEMBER
-        )
+        # Create GroupMembership (member_count is updated alongside)
+        with transaction.atomic():
+            GroupMembership.objects.create(
+                user=request.user,
+                group=group,
+                role=GroupMembership.Role.MEMBER,
+            )
         return Response(
             {"detail": "Successfully joined the group"},
             status=status.HTTP_201_CREATED,
@@ -243,7 +640,7 @@ class GroupViewSet(viewsets.ModelViewSet):
                 {"detail": "Group not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        if group.members.filter(id=request.user.id).exists():
+        if group.pk in get_membership_roles(request):
             return Response(
                 {"detail": "You are already in this group"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -256,7 +653,6 @@ class GroupViewSet(viewsets.ModelViewSet):
                     "You can directly join."
                 },
                 status=status.HTTP_400_BAD_REQUEST,
-
             )
 
         # Check for duplicate pending request
@@ -280,7 +676,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class MembershipRequestViewSet(viewsets.ModelViewSet):
+class MembershipRequestViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for MembershipRequest model.
     Only admins of a group can approve or reject requests for that group.
@@ -290,6 +686,8 @@ class MembershipRequestViewSet(viewsets.ModelViewSet):
 
     serializer_class = MembershipRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Reads from the primary; approving pins the admin to it
+    replica_actions = ()
 
     def get_queryset(self):
         """
@@ -298,9 +696,11 @@ class MembershipRequestViewSet(viewsets.ModelViewSet):
         - their own membership requests.
         """
         user = self.request.user
-        admin_groups = GroupMembership.objects.filter(
-            user=user, role=GroupMembership.Role.ADMIN
-        ).values_list("group_id", flat=True)
+        admin_groups = [
+            group_id
+            for group_id, role in get_membership_roles(self.request).items()
+            if role == GroupMembership.Role.ADMIN
+        ]
 
         return MembershipRequest.objects.filter(
             Q(group_id__in=admin_groups) | Q(user=user)
@@ -325,3 +725,41 @@ class MembershipRequestViewSet(viewsets.ModelViewSet):
         membership_request = self.get_object()
         membership_request.reject()
         return Response({"detail": "Request rejected"})
+
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
+        """
+        Approve or reject many pending requests at once:
+        {"ids": [...], "action": "approve" | "reject"}.
+        Admin rights are checked once per group; requests that are not
+        pending or not in the user's admin groups are skipped.
+        """
+        serializer = MembershipRequestBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+        roles = get_membership_roles(request)
+
+        with transaction.atomic():
+            pending = list(
+                MembershipRequest.objects.filter(
+                    pk__in=ids, status=MembershipRequest.Status.PENDING
+                ).select_for_update()
+            )
+            is_admin = {
+                group_id: roles.get(group_id) == GroupMembership.Role.ADMIN
+                for group_id in {req.group_id for req in pending}
+            }
+            allowed = [req for req in pending if is_admin[req.group_id]]
+            if allowed:
+                if serializer.validated_data["action"] == "approve":
+                    approve_requests(allowed)
+                else:
+                    reject_requests(allowed)
+
+        processed = {req.pk for req in allowed}
+        return Response(
+            {
+                "processed": [pk for pk in ids if pk in processed],
+                "skipped": [pk for pk in ids if pk not in processed],
+            }
+        )
@@ -0,0 +1,87 @@
+import operator
+from functools import reduce
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+
+from .memberships import load_membership_roles
+from .models import FeedEntry, Prayer, GroupMembership
+
+
+def member_group_ids(user):
+    """
+    Ids of the groups the user belongs to.
+    With the query cache enabled this is the cached membership list
+    (see apps/prayer/memberships.py); otherwise it is a subquery.
+    """
+    if not settings.QUERY_CACHE_ENABLED:
+        return GroupMembership.objects.filter(user=user).values("group_id")
+    return list(load_membership_roles(user))
+
+
+def visibility_conditions(user):
+    """
+    Returns the independent conditions of prayer visibility:
+    1) public prayers (privacy_level indexes),
+    2) prayers authored by the user (author FK indexes),
+    3) group-level prayers in the user's groups, as a semi-join on the
+       membership's group ids, or the user's materialized timeline,
+       see materialized_group_conditions.
+    None of them joins a multi-valued relation, so OR-ing them selects
+    each prayer once and needs no DISTINCT.
+    """
+    public = Q(privacy_level=Prayer.PrivacyLevel.PUBLIC)
+    authored = Q(author=user)
+    if settings.FEED_MATERIALIZATION_ENABLED:
+        return [public, authored, *materialized_group_conditions(user)]
+    group = Q(
+        privacy_level=Prayer.PrivacyLevel.GROUP,
+        group_id__in=member_group_ids(user),
+    )
+    return [public, authored, group]
+
+
+def materialized_group_conditions(user):
+    """
+    Group prayers when the home feed is materialized (apps/prayer/feed.py):
+    the user's FeedEntry timeline, plus prayers of the user's groups that
+    are too large to fan out and are read from the group instead.
+    """
+    group_prayers = Q(privacy_level=Prayer.PrivacyLevel.GROUP)
+    # An entry only counts while the prayer is still in the entry's group
+    timeline = Exists(
+        FeedEntry.objects.filter(
+            user=user,
+            prayer_id=OuterRef("pk"),
+            group_id=OuterRef("group_id"),
+        )
+    )
+    large_groups = Q(
+        group_id__in=GroupMembership.objects.filter(
+            user=user, group__fanout_on_read=True
+        ).values("group_id")
+    )
+    return [group_prayers & Q(timeline), group_prayers & large_groups]
+
+
+def visible_prayers(user, queryset=None):
+    """
+    Returns the prayers the user is allowed to see.
+    The conditions are OR-ed without joins, so an ordered, limited page
+    (the cursor pagination) can be read from the feed index and stop
+    after the page, instead of de-duplicating every visible prayer first.
+    """
+    if queryset is None:
+        queryset = Prayer.objects.all()
+    return queryset.filter(reduce(operator.or_, visibility_conditions(user)))
+
+
+async def avisible_prayers(user, queryset=None):
+    """
+    visible_prayers() for async views. The queryset is lazy unless the
+    membership list comes from the query cache, which is read in a thread.
+    """
+    if settings.QUERY_CACHE_ENABLED:
+        return await sync_to_async(visible_prayers)(user, queryset)
+    return visible_prayers(user, queryset)
@@ -0,0 +1,244 @@
+"""
+WebSocket endpoint for realtime events (see apps/prayer/realtime.py),
+routed by config/asgi.py.
+
+Connect to /ws/?token=<access token>, then send
+``{"action": "subscribe", "channels": ["group:1", "prayer:7"]}`` or
+``{"action": "unsubscribe", "channels": [...]}``. Channels the user may
+not see are answered as denied. Events arrive as JSON text frames.
+Subscriptions are checked again when the user leaves a group or a prayer's
+visibility changes; those the user lost access to are ended with a
+``{"event": "revoked", "channels": [...]}`` frame.
+"""
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.common import metrics
+from apps.common.broker import get_broker
+from apps.users.authentication import StatelessJWTAuthentication
+
+from .models import GroupMembership, Prayer
+from .realtime import (
+    ACCESS_CHANGED,
+    group_channel,
+    parse_channel,
+    prayer_channel,
+    user_channel,
+)
+from .visibility import visible_prayers
+
+WEBSOCKET_PATH = "/ws/"
+
+# Channels one connection may subscribe to
+MAX_CHANNELS = 500
+
+# Close codes, in the range reserved for applications
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+_connections = set()
+metrics.register_gauge("realtime.connections", lambda: len(_connections))
+
+
+def database_sync_to_async(func):
+    """
+    sync_to_async() for ORM code, closing stale connections before and
+    after like Django does around a request. A WebSocket outlives many
+    requests, so its thread's connection would otherwise never be
+    recycled.
+    """
+
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run)
+
+
+def authenticate(token):
+    """The user of an access token, or None."""
+    authentication = StatelessJWTAuthentication()
+    try:
+        return authentication.get_user(
+            authentication.get_validated_token(token)
+        )
+    except AuthenticationFailed:
+        return None
+
+
+def allowed_channels(user, channels):
+    """
+    The channels the user may subscribe to: the channels of groups they
+    belong to and of prayers they can see.
+    """
+    ids = {"group": set(), "prayer": set()}
+    for channel in channels:
+        parsed = parse_channel(channel)
+        if parsed is not None:
+            ids[parsed[0]].add(parsed[1])
+
+    group_ids = GroupMembership.objects.filter(
+        user=user, group_id__in=ids["group"]
+    ).values_list("group_id", flat=True)
+    prayer_ids = visible_prayers(
+        user, Prayer.objects.filter(pk__in=ids["prayer"])
+    ).values_list("pk", flat=True)
+    return {group_channel(pk) for pk in group_ids} | {
+        prayer_channel(pk) for pk in prayer_ids
+    }
+
+
+class RealtimeConnection:
+    """Subscriptions of one WebSocket and the forwarding of their events."""
+
+    def __init__(self, user, send):
+        self.user = user
+        self.send = send
+        self.pubsub = get_broker().pubsub()
+        self.channels = set()
+        # Incremented on every ACCESS_CHANGED, so a subscribe() that
+        # overlapped one checks again
+        self.access_version = 0
+
+    async def start(self):
+        """Listens for ACCESS_CHANGED events about the user."""
+        await self.pubsub.subscribe(user_channel(self.user.pk))
+
+    async def send_json(self, data):
+        await self.send({"type": "websocket.send", "text": json.dumps(data)})
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            action = message["action"]
+            channels = {str(channel) for channel in message["channels"]}
+        except (ValueError, KeyError, TypeError):
+            await self.send_json(
+                {"event": "error", "detail": "Invalid message."}
+            )
+            return
+
+        if action == "subscribe":
+            await self.subscribe(channels)
+        elif action == "unsubscribe":
+            await self.unsubscribe(channels)
+        else:
+            await self.send_json(
+                {"event": "error", "detail": f"Unknown action {action!r}."}
+            )
+
+    async def subscribe(self, channels):
+        while True:
+            version = self.access_version
+            allowed = await database_sync_to_async(allowed_channels)(
+                self.user, channels
+            )
+            if version == self.access_version:
+                break
+        new = allowed - self.channels
+        if len(self.channels) + len(new) > MAX_CHANNELS:
+            await self.send_json(
+                {"event": "error", "detail": "Too many channels."}
+            )
+            return
+        if new:
+            await self.pubsub.subscribe(*new)
+            self.channels |= new
+        await self.send_json(
+            {
+                "event": "subscribed",
+                "channels": sorted(allowed),
+                "denied": sorted(channels - allowed),
+            }
+        )
+
+    async def unsubscribe(self, channels):
+        channels &= self.channels
+        if channels:
+            await self.pubsub.unsubscribe(*channels)
+            self.channels -= channels
+        await self.send_json(
+            {"event": "unsubscribed", "channels": sorted(channels)}
+        )
+
+    async def recheck(self, channels):
+        """Ends the subscriptions to channels the user may no longer see."""
+        self.access_version += 1
+        channels &= self.channels
+        if not channels:
+            return
+        allowed = await database_sync_to_async(allowed_channels)(
+            self.user, channels
+        )
+        revoked = channels - allowed
+        if revoked:
+            await self.pubsub.unsubscribe(*revoked)
+            self.channels -= revoked
+            await self.send_json(
+                {"event": "revoked", "channels": sorted(revoked)}
+            )
+
+    async def forward(self):
+        """Sends the events of the subscribed channels to the client."""
+        own_channel = user_channel(self.user.pk)
+        while True:
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=1.0
+            )
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"]
+            if message["data"] == ACCESS_CHANGED:
+                await self.recheck(
+                    set(self.channels) if channel == own_channel else {channel}
+                )
+            # Messages queued before an unsubscribe are dropped
+            elif channel in self.channels:
+                await self.send(
+                    {"type": "websocket.send", "text": message["data"]}
+                )
+
+    async def close(self):
+        await self.pubsub.aclose()
+
+
+async def websocket_application(scope, receive, send):
+    """ASGI application for "websocket" connections."""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if scope["path"] != WEBSOCKET_PATH:
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = query.get("token", [""])[0]
+    user = await database_sync_to_async(authenticate)(token) if token else None
+    if user is None:
+        await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+        return
+
+    await send({"type": "websocket.accept"})
+    connection = RealtimeConnection(user, send)
+    await connection.start()
+    _connections.add(connection)
+    forward = asyncio.create_task(connection.forward())
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") is not None:
+                await connection.handle(message["text"])
+    finally:
+        forward.cancel()
+        _connections.discard(connection)
+        await connection.close()
@@ -0,0 +1,68 @@
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ClaimsUser
+from .tokens import (
+    CLAIM_FIELDS,
+    VERSION_CLAIM,
+    denylist_is_shared,
+    is_revoked,
+)
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a query per request: the user is built
+    from the token claims and the row is only read when a field outside
+    the claims is used. Revoked tokens are rejected by the cached denylist
+    (see apps/users/tokens.py). Without a shared cache the denylist is not
+    reliable, so the user row is read and checked on every request.
+    """
+
+    def get_user(self, validated_token):
+        if not denylist_is_shared():
+            return self.get_checked_user(validated_token)
+        claims = {
+            "id": api_settings.USER_ID_CLAIM,
+            "token_version": VERSION_CLAIM,
+            **{field: field for field in CLAIM_FIELDS},
+        }
+        try:
+            values = {
+                field: validated_token[claim]
+                for field, claim in claims.items()
+            }
+        except KeyError:
+            # Issued before the claims were added
+            return self.get_checked_user(validated_token)
+
+        if is_revoked(values["id"], values["token_version"]):
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+        # from_db() expects the values in field order
+        names = [
+            field.attname
+            for field in ClaimsUser._meta.concrete_fields
+            if field.attname in values
+        ]
+        return ClaimsUser.from_db(
+            router.db_for_read(ClaimsUser),
+            names,
+            [values[name] for name in names],
+        )
+
+    def get_checked_user(self, validated_token):
+        """
+        The user row of the token, which must be active (checked by
+        JWTAuthentication) and still have the token's version.
+        """
+        user = super().get_user(validated_token)
+        if validated_token.get(VERSION_CLAIM, 0) != user.token_version:
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+        return user
@@ -0,0 +1,185 @@
+"""
+Avatar processing.
+
+An uploaded avatar is validated and re-encoded without its EXIF data
+(camera, GPS position) on the request thread, before it is first saved,
+so the stored file never carries it. A background task
+(apps/common/tasks.py) then writes square WebP thumbnails next to it, one
+per THUMBNAIL_SIZES. User.avatar_thumbnails maps each size to its file
+once they exist. render_avatar() does both for avatars stored earlier; it
+only needs the image bytes, so backfill_avatar_thumbnails runs it in a
+process pool.
+"""
+
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# Edge lengths of the square thumbnails, in pixels
+THUMBNAIL_SIZES = (48, 96, 256)
+THUMBNAIL_QUALITY = 80
+# Re-encoding quality of uploads that carried EXIF data
+ORIGINAL_QUALITY = 90
+
+ALLOWED_FORMATS = ("JPEG", "PNG", "WEBP")
+MAX_PIXELS = 50_000_000
+
+
+def avatar_error(upload):
+    """Why an uploaded avatar is rejected, or None if it is fine."""
+    if upload.size > settings.AVATAR_MAX_UPLOAD_SIZE:
+        limit = filesizeformat(settings.AVATAR_MAX_UPLOAD_SIZE)
+        return f"The image may not be larger than {limit}."
+    # Set by the ImageField that validated the upload
+    image = upload.image
+    if image.format not in ALLOWED_FORMATS:
+        return "Upload a JPEG, PNG or WebP image."
+    if image.width * image.height > MAX_PIXELS:
+        return "The image has too many pixels."
+    return None
+
+
+def thumbnail_name(name, size):
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return posixpath.join(
+        posixpath.dirname(name), "thumbnails", f"{stem}_{size}.webp"
+    )
+
+
+def _square(image, size):
+    """The centered square of the image, scaled to size x size."""
+    edge = min(image.width, image.height)
+    left = (image.width - edge) // 2
+    top = (image.height - edge) // 2
+    return image.resize(
+        (size, size),
+        Image.Resampling.LANCZOS,
+        box=(left, top, left + edge, top + edge),
+        reducing_gap=3.0,
+    )
+
+
+def _load(data):
+    """
+    (image, format, ICC profile, whether it carries EXIF or XMP data) for
+    the image bytes, with the EXIF orientation applied to the pixels.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image_format = source.format
+        has_exif = bool(source.getexif()) or "xmp" in source.info
+        # The color profile is kept, it is not personal data
+        icc_profile = source.info.get("icc_profile")
+        image = ImageOps.exif_transpose(source)
+    image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    return image, image_format, icc_profile, has_exif
+
+
+def _encode_original(image, image_format, icc_profile):
+    output = io.BytesIO()
+    image.save(
+        output,
+        image_format,
+        quality=ORIGINAL_QUALITY,
+        icc_profile=icc_profile,
+    )
+    return output.getvalue()
+
+
+def _encode_thumbnails(image, icc_profile):
+    thumbnails = {}
+    base = None
+    for size in sorted(THUMBNAIL_SIZES, reverse=True):
+        # Smaller thumbnails are scaled down from the largest one
+        base = _square(image, size) if base is None else _square(base, size)
+        output = io.BytesIO()
+        base.save(
+            output,
+            "WEBP",
+            quality=THUMBNAIL_QUALITY,
+            icc_profile=icc_profile,
+        )
+        thumbnails[size] = output.getvalue()
+    return thumbnails
+
+
+def strip_metadata(data):
+    """
+    The image bytes re-encoded without EXIF data, or None if they had
+    none.
+    """
+    image, image_format, icc_profile, has_exif = _load(data)
+    if not has_exif:
+        return None
+    return _encode_original(image, image_format, icc_profile)
+
+
+def render_thumbnails(data):
+    """{size: WebP bytes} for the image bytes, without EXIF data."""
+    image, _image_format, icc_profile, _has_exif = _load(data)
+    return _encode_thumbnails(image, icc_profile)
+
+
+def render_avatar(data):
+    """
+    Returns (original, thumbnails) for the image bytes: the image
+    re-encoded without EXIF data, or None if it had none, and
+    {size: WebP bytes}. The thumbnails never carry EXIF data.
+    """
+    image, image_format, icc_profile, has_exif = _load(data)
+    original = None
+    if has_exif:
+        original = _encode_original(image, image_format, icc_profile)
+    return original, _encode_thumbnails(image, icc_profile)
+
+
+def _replace(name, content):
+    """Saves content under name, replacing the file stored there."""
+    default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+def store_avatar(user_id, name, original, thumbnails):
+    """
+    Stores the output of render_avatar() for the user's avatar ``name``.
+    Returns whether the user still had that avatar.
+    """
+    names = {
+        str(size): _replace(thumbnail_name(name, size), content)
+        for size, content in thumbnails.items()
+    }
+    avatar = name if original is None else _replace(name, original)
+    updated = User.objects.filter(pk=user_id, avatar=name).update(
+        avatar=avatar, avatar_thumbnails=names
+    )
+    if not updated:
+        # A newer upload replaced this avatar in the meantime
+        delete_files(names.values())
+    return bool(updated)
+
+
+def process_avatar(user_id, name):
+    """
+    Background task: writes the thumbnails of the user's avatar, which
+    UserUpdateSerializer already stripped.
+    """
+    with default_storage.open(name) as file:
+        data = file.read()
+    store_avatar(user_id, name, None, render_thumbnails(data))
+
+
+def delete_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete %s", name, exc_info=True)
@@ -0,0 +1,23 @@
+from django.core.checks import Error, Tags, register
+
+from .tokens import denylist_is_shared
+
+
+@register(Tags.security, deploy=True)
+def check_denylist_cache(app_configs, **kwargs):
+    """
+    Revoked access tokens are only rejected by every process when the
+    denylist lives in a shared cache (apps/users/tokens.py).
+    """
+    if denylist_is_shared():
+        return []
+    return [
+        Error(
+            "The JWT denylist needs a cache shared by all processes.",
+            hint=(
+                "Set CACHE_REDIS. Until then every request reads the user "
+                "row to check the token."
+            ),
+            id="users.E001",
+        )
+    ]
@@ -0,0 +1,73 @@
+"""
+Password hashing.
+
+The hashers below are Django's with their cost taken from settings, and
+PASSWORD_HASHER picks the one new hashes use. Django re-hashes a password
+on the next successful login when its algorithm is not the preferred one
+or its parameters differ, so changing either upgrades hashes lazily.
+
+Hashing is slow on purpose. offload_password_hashing() moves the views
+that hash onto a dedicated thread pool (see below).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import close_old_connections
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = settings.PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    work_factor = settings.SCRYPT_WORK_FACTOR
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Needs argon2-cffi."""
+
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            thread_name_prefix="password-hashing",
+        )
+    return _executor
+
+
+def _run(view, request, args, kwargs):
+    close_old_connections()
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def offload_password_hashing(view):
+    """
+    Wraps a sync view that hashes passwords in an async view running it on
+    the password hashing pool. Under ASGI Django runs all sync views on
+    one shared thread, which a login storm would otherwise hold up; the
+    hash functions release the GIL, so the pool hashes in parallel.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(
+            _run, thread_sensitive=False, executor=_get_executor()
+        )(view, request, args, kwargs)
+
+    return wrapper
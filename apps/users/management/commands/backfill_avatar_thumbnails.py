@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.users.avatars import render_avatar, store_avatar
+from apps.users.models import User
+
+
+def read(name):
+    with default_storage.open(name) as file:
+        return file.read()
+
+
+class Command(BaseCommand):
+    help = (
+        "Strip EXIF data from existing avatars and write their thumbnails. "
+        "Images are rendered in a process pool; files and rows are written "
+        "by this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Rendering processes, e.g. one per core.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also redo avatars that already have thumbnails.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(avatar="").exclude(avatar__isnull=True)
+        if not options["all"]:
+            users = users.filter(avatar_thumbnails={})
+        pending = list(users.order_by("pk").values_list("pk", "avatar"))
+        # Forked workers must not share this process's connections
+        connections.close_all()
+
+        workers = options["workers"]
+        processed = failed = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # A few images per worker in flight bounds the memory used
+            for start in range(0, len(pending), workers * 4):
+                jobs = []
+                for user_id, name in pending[start : start + workers * 4]:
+                    try:
+                        future = executor.submit(render_avatar, read(name))
+                    except OSError as e:
+                        self.stderr.write(f"User {user_id}: {e}")
+                        failed += 1
+                        continue
+                    jobs.append((user_id, name, future))
+                for user_id, name, future in jobs:
+                    try:
+                        store_avatar(user_id, name, *future.result())
+                    except Exception as e:
+                        self.stderr.write(f"User {user_id}: {e}")
+                        failed += 1
+                    else:
+                        processed += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {processed} avatars, {failed} failed"
+            )
+        )
@@ -0,0 +1,59 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+PASSWORD = "correct horse battery staple"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verifications (logins) per second for each "
+        "configured hasher."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=2.0,
+            help="How long to run each hasher.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Verify in this many threads, e.g. one per core.",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as e:
+                # Missing library, e.g. argon2-cffi
+                self.stdout.write(f"{hasher.algorithm:<16} skipped: {e}")
+                continue
+
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                counts = executor.map(
+                    self.verify_for,
+                    [hasher] * threads,
+                    [encoded] * threads,
+                    [options["seconds"]] * threads,
+                )
+                rate = sum(counts) / options["seconds"]
+            self.stdout.write(
+                f"{hasher.algorithm:<16} {rate:8.1f} logins/s "
+                f"({rate / threads:.1f} per thread)"
+            )
+
+    def verify_for(self, hasher, encoded, seconds):
+        count = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            hasher.verify(PASSWORD, encoded)
+            count += 1
+        return count
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-18 05:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_user_token_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar_thumbnails",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -35,6 +35,12 @@ class User(AbstractUser):
     phone = models.CharField(max_length=15, blank=True)
     bio = models.TextField(blank=True)
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
+    # {size: file name} of the avatar's thumbnails (see apps/users/avatars.py)
+    avatar_thumbnails = models.JSONField(
+        default=dict, blank=True, editable=False
+    )
+    # Stamped into JWTs; bumping it revokes them (see apps/users/tokens.py)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -56,3 +62,20 @@ class User(AbstractUser):
     @property
     def is_admin_user(self):
         return self.role == self.Roles.ADMIN
+
+
+class ClaimsUser(User):
+    """
+    User built from the claims of an access token
+    (see apps/users/authentication.py). The fields that are not in the
+    token are deferred and all loaded by one query on first access.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None):
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.intersection(fields):
+            fields = list(deferred.union(fields))
+        super().refresh_from_db(using=using, fields=fields)
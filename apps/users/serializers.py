@@ -1,10 +1,30 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.common.tasks import run_in_background
+
+from .avatars import (
+    avatar_error,
+    delete_files,
+    process_avatar,
+    strip_metadata,
+)
+from .tokens import VERSION_CLAIM, add_claims
 
 User = get_user_model()
 
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = (
@@ -15,10 +35,23 @@ class UserSerializer(serializers.ModelSerializer):
             "phone",
             "bio",
             "avatar",
+            "avatar_thumbnails",
             "role",
         )
         read_only_fields = ("role",)
 
+    def get_avatar_thumbnails(self, obj):
+        """
+        {size: URL} of the square WebP thumbnails, e.g. "48", "96" and
+        "256"; empty until the avatar has been processed.
+        """
+        request = self.context.get("request")
+        urls = {}
+        for size, name in obj.avatar_thumbnails.items():
+            url = default_storage.url(name)
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
+
 
 class UserCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating user account."""
@@ -58,3 +91,75 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             "avatar",
         )
         read_only_fields = ("email", "role")
+
+    def validate_avatar(self, value):
+        if value:
+            error = avatar_error(value)
+            if error:
+                raise serializers.ValidationError(error)
+        return value
+
+    def update(self, instance, validated_data):
+        """
+        A new avatar is stored without its EXIF data and thumbnailed in
+        the background; the thumbnails of the previous one are deleted.
+        """
+        if "avatar" not in validated_data:
+            return super().update(instance, validated_data)
+        upload = validated_data["avatar"]
+        if upload:
+            upload.seek(0)
+            stripped = strip_metadata(upload.read())
+            if stripped is not None:
+                validated_data["avatar"] = ContentFile(
+                    stripped, name=upload.name
+                )
+        old_thumbnails = list(instance.avatar_thumbnails.values())
+        instance.avatar_thumbnails = {}
+        instance = super().update(instance, validated_data)
+        if old_thumbnails:
+            run_in_background(delete_files, old_thumbnails)
+        if instance.avatar:
+            run_in_background(
+                process_avatar, instance.pk, instance.avatar.name
+            )
+        return instance
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issues tokens carrying the claims used by authentication."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Checks the token version against the database and re-reads the
+    claims, so a refreshed access token never carries stale ones.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(
+            pk=refresh.payload.get(api_settings.USER_ID_CLAIM)
+        ).first()
+        if (
+            user is None
+            or not api_settings.USER_AUTHENTICATION_RULE(user)
+            or refresh.payload.get(VERSION_CLAIM, 0) != user.token_version
+        ):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+
+        add_claims(refresh, user)
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
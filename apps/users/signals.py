@@ -0,0 +1,42 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import ClaimsUser, User
+from .tokens import CLAIM_FIELDS, revoke_deleted_user, revoke_tokens
+
+# Changing any of these invalidates the user's tokens
+REVOKING_FIELDS = ("password", "is_active", *CLAIM_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=ClaimsUser)
+def detect_credential_change(sender, instance, update_fields=None, **kwargs):
+    instance._revoke_tokens = False
+    if instance._state.adding:
+        return
+    fields = set(REVOKING_FIELDS) - instance.get_deferred_fields()
+    if update_fields is not None:
+        fields &= set(update_fields)
+    if instance._password is None:
+        # No set_password(): at most a re-hash of the same password on login
+        fields.discard("password")
+    if not fields:
+        return
+    old = User._base_manager.filter(pk=instance.pk).values(*fields).first()
+    instance._revoke_tokens = old is not None and any(
+        old[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=ClaimsUser)
+def revoke_on_credential_change(sender, instance, **kwargs):
+    if instance._revoke_tokens:
+        revoke_tokens(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=ClaimsUser)
+def revoke_on_delete(sender, instance, **kwargs):
+    # The claims alone would keep authenticating the deleted user
+    revoke_deleted_user(instance.pk)
@@ -1,3 +1,156 @@
-from django.test import TestCase  # noqa: F401
+import io
+import tempfile
 
-# Create your tests here.
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from . import urls
+from .authentication import StatelessJWTAuthentication
+from .models import User
+from .serializers import ClaimsTokenObtainPairSerializer
+from .tokens import _denylist_timeout, revoke_tokens
+
+
+def local_cache():
+    return override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        }
+    )
+
+
+def shared_cache():
+    return override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": (
+                    "django.core.cache.backends.filebased.FileBasedCache"
+                ),
+                "LOCATION": tempfile.mkdtemp(),
+            }
+        }
+    )
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="user@example.com", password=None
+        )
+        self.authentication = StatelessJWTAuthentication()
+
+    def validated_token(self):
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user)
+        return self.authentication.get_validated_token(str(token.access_token))
+
+    @local_cache()
+    def test_local_cache_checks_the_user_row(self):
+        validated = self.validated_token()
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.authentication.get_user(validated), self.user
+            )
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(validated)
+
+    @local_cache()
+    def test_local_cache_rejects_revoked_tokens(self):
+        validated = self.validated_token()
+        # Bumps the version without touching the denylist
+        User.objects.filter(pk=self.user.pk).update(token_version=1)
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(validated)
+
+    def test_shared_cache_uses_the_claims_and_denylist(self):
+        with shared_cache():
+            validated = self.validated_token()
+            with self.assertNumQueries(0):
+                self.assertEqual(
+                    self.authentication.get_user(validated).pk, self.user.pk
+                )
+
+            revoke_tokens(self.user)
+            with self.assertRaises(AuthenticationFailed):
+                self.authentication.get_user(validated)
+
+    def test_shared_cache_rejects_deleted_users(self):
+        with shared_cache():
+            token = ClaimsTokenObtainPairSerializer.get_token(self.user)
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {token.access_token}"
+            )
+            response = client.delete(f"/api/v1/users/{self.user.pk}/")
+            self.assertEqual(response.status_code, 204)
+
+            response = client.get("/api/v1/prayers/")
+            self.assertEqual(response.status_code, 401)
+
+    def test_denylist_outlives_every_issued_token(self):
+        self.assertGreaterEqual(
+            _denylist_timeout(),
+            api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+        )
+
+
+class JWTCreateURLTests(SimpleTestCase):
+    def test_create_route_is_anchored(self):
+        (pattern,) = [
+            pattern
+            for pattern in urls.urlpatterns
+            if getattr(pattern, "name", None) == "jwt-create"
+        ]
+        for path in ["auth/jwt/create/", "auth/jwt/create"]:
+            self.assertIsNotNone(pattern.resolve(path))
+        self.assertIsNone(pattern.resolve("auth/jwt/create/extra/"))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class AvatarUploadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="user@example.com", password=None
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotated 90 degrees
+        exif[0x010F] = "Camera maker"
+        output = io.BytesIO()
+        Image.new("RGB", (40, 20), "red").save(output, "JPEG", exif=exif)
+        return SimpleUploadedFile(
+            "avatar.jpg", output.getvalue(), content_type="image/jpeg"
+        )
+
+    def test_avatar_is_stored_without_exif_before_thumbnails(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.patch(
+                f"/api/v1/users/{self.user.pk}/",
+                {"avatar": self.upload()},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        with default_storage.open(self.user.avatar.name) as file:
+            with Image.open(file) as image:
+                self.assertEqual(dict(image.getexif()), {})
+                self.assertEqual(image.size, (20, 40))
+        self.assertEqual(self.user.avatar_thumbnails, {})
+
+        for callback in callbacks:
+            callback()
+        self.user.refresh_from_db()
+        self.assertEqual(
+            sorted(self.user.avatar_thumbnails), ["256", "48", "96"]
+        )
@@ -0,0 +1,87 @@
+"""
+Token claims and revocation.
+
+Access tokens carry the user fields most requests need (CLAIM_FIELDS),
+so requests are authenticated without reading the users table. Every
+token is stamped with the user's token_version. Revoking bumps it and
+keeps the new minimum version in the cache for as long as an access
+token lives; refresh tokens are checked against the database instead.
+Deleting a user denylists all of their tokens the same way.
+
+The denylist only works when every process sees the same cache. With a
+process-local cache (the default local memory cache), access tokens are
+checked against the database on every request instead, see
+denylist_is_shared() and apps/users/checks.py.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db.models import F
+from rest_framework_simplejwt.settings import api_settings
+
+VERSION_CLAIM = "ver"
+# Denylisted minimum version of deleted users, above any token's
+DELETED_USER_VERSION = 2**63 - 1
+CLAIM_FIELDS = ("email", "role", "is_staff")
+
+# Cache backends that live in one process, or keep nothing at all
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def add_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def _denylist_key(user_id):
+    return f"jwt:min-version:{user_id}"
+
+
+def revoke_tokens(user):
+    """Invalidates every token issued to the user so far."""
+    users = get_user_model()._base_manager.filter(pk=user.pk)
+    users.update(token_version=F("token_version") + 1)
+    user.token_version = users.values_list("token_version", flat=True).get()
+    cache.set(
+        _denylist_key(user.pk),
+        user.token_version,
+        _denylist_timeout(),
+    )
+
+
+def revoke_deleted_user(user_id):
+    """Invalidates every token of a deleted user, whatever its version."""
+    cache.set(
+        _denylist_key(user_id), DELETED_USER_VERSION, _denylist_timeout()
+    )
+
+
+def _denylist_timeout():
+    """
+    Seconds until every access token issued before now has expired:
+    the newest one was issued at the latest now and is accepted until
+    its exp plus the leeway.
+    """
+    leeway = api_settings.LEEWAY
+    if isinstance(leeway, timedelta):
+        leeway = leeway.total_seconds()
+    return api_settings.ACCESS_TOKEN_LIFETIME.total_seconds() + leeway
+
+
+def denylist_is_shared():
+    """Whether all server processes see the same denylist."""
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]["BACKEND"]
+    return backend not in LOCAL_CACHE_BACKENDS
+
+
+def is_revoked(user_id, version):
+    min_version = cache.get(_denylist_key(user_id))
+    return min_version is not None and version < min_version
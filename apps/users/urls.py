@@ -1,6 +1,8 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView
 
+from .hashers import offload_password_hashing
 from .views import UserViewSet
 
 app_name = "users"
@@ -9,6 +11,18 @@ router = DefaultRouter()
 router.register("users", UserViewSet, basename="users")
 
 urlpatterns = [
+    # The views that hash passwords run on the hashing thread pool
+    path(
+        "users/change_password/",
+        offload_password_hashing(
+            UserViewSet.as_view({"post": "change_password"})
+        ),
+    ),
+    re_path(
+        r"^auth/jwt/create/?$",
+        offload_password_hashing(TokenObtainPairView.as_view()),
+        name="jwt-create",
+    ),
     path("", include(router.urls)),
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.jwt")),
@@ -9,5 +9,18 @@ os.environ.setdefault(
     "DJANGO_SETTINGS_MODULE",
     os.getenv("DJANGO_SETTINGS_MODULE", "config.settings.dev"),
 )
+# Serve the async variants of the hot read paths, see apps/common/views.py
+os.environ.setdefault("ASYNC_VIEWS_ENABLED", "True")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once the apps are loaded
+from apps.prayer.websocket import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Django for HTTP, the realtime endpoint for WebSockets."""
+    if scope["type"] == "websocket":
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -74,18 +74,77 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Database connections. DB_CONN_MAX_AGE keeps a connection open per
+# thread for that many seconds (None: unlimited), which suits gunicorn's
+# long-lived worker threads. DB_POOL_SIZE > 0 instead shares up to that
+# many connections per process and database (apps/common/db/pool.py),
+# which suits uvicorn, where requests run in short-lived threads; waiting
+# longer than DB_POOL_TIMEOUT seconds for one is an OperationalError.
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "0")
+DB_CONN_MAX_AGE = (
+    None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE)
+)
+DB_CONN_HEALTH_CHECKS = (
+    os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "0"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+POSTGRES_ENGINE = (
+    "apps.common.db.postgresql"
+    if DB_POOL_SIZE > 0
+    else "django.db.backends.postgresql"
+)
+DATABASE_CONNECTION_OPTIONS = {
+    # Pooled connections are returned to the pool when Django closes them
+    "CONN_MAX_AGE": 0 if DB_POOL_SIZE > 0 else DB_CONN_MAX_AGE,
+    "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+    "POOL_SIZE": DB_POOL_SIZE,
+    "POOL_TIMEOUT": DB_POOL_TIMEOUT,
+}
+
 # Database
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": POSTGRES_ENGINE,
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        **DATABASE_CONNECTION_OPTIONS,
     }
 }
 
+# Read replicas for the prayer and group read endpoints
+# (apps/common/db/routers.py). DB_REPLICA_HOSTS is a comma-separated list
+# of host[:port]; the replicas use the primary's name and credentials.
+# Users read from the primary for DB_REPLICA_PIN_SECONDS after a write.
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host
+]
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+DATABASE_REPLICAS = [
+    f"replica{number}" for number in range(1, len(DB_REPLICA_HOSTS) + 1)
+]
+DATABASE_ROUTERS = ["apps.common.db.routers.ReplicaRouter"]
+
+
+def replica_databases(primary):
+    """DATABASES entries of the replicas, based on the primary's."""
+    databases = {}
+    for alias, host in zip(DATABASE_REPLICAS, DB_REPLICA_HOSTS):
+        host, _sep, port = host.partition(":")
+        databases[alias] = {
+            **primary,
+            "HOST": host,
+            "PORT": port or primary["PORT"],
+            "TEST": {"MIRROR": "default"},
+        }
+    return databases
+
+
+DATABASES.update(replica_databases(DATABASES["default"]))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,6 +172,34 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (apps/users/hashers.py). PASSWORD_HASHER is "pbkdf2",
+# "scrypt" or "argon2" (needs argon2-cffi). Existing hashes are upgraded
+# to the preferred algorithm and cost on the user's next login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "600000"))
+SCRYPT_WORK_FACTOR = int(os.getenv("SCRYPT_WORK_FACTOR", str(2**14)))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+# KiB
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+_PASSWORD_HASHERS = {
+    "pbkdf2": "apps.users.hashers.PBKDF2PasswordHasher",
+    "scrypt": "apps.users.hashers.ScryptPasswordHasher",
+    "argon2": "apps.users.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(
+        hasher
+        for name, hasher in _PASSWORD_HASHERS.items()
+        if name != PASSWORD_HASHER
+    ),
+]
+# Threads that hash passwords for the login and password change views
+PASSWORD_HASHING_WORKERS = int(
+    os.getenv("PASSWORD_HASHING_WORKERS", str(os.cpu_count() or 1))
+)
+
 # Internationalization
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "Europe/Ljubljana"
@@ -127,6 +214,10 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 # Media files
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Largest accepted avatar upload, in bytes (apps/users/avatars.py)
+AVATAR_MAX_UPLOAD_SIZE = int(
+    os.getenv("AVATAR_MAX_UPLOAD_SIZE", str(10 * 1024 * 1024))
+)
 
 # User model settings
 AUTH_USER_MODEL = "users.User"
@@ -134,11 +225,21 @@ AUTH_USER_MODEL = "users.User"
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.StatelessJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson-backed when installed, see apps/common/renderers.py
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.common.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "apps.common.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -147,8 +248,80 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "apps.users.serializers.ClaimsTokenObtainPairSerializer"
+    ),
+    "TOKEN_REFRESH_SERIALIZER": (
+        "apps.users.serializers.ClaimsTokenRefreshSerializer"
+    ),
 }
 
+# Django cache. Set CACHE_REDIS so all processes share it, which the
+# JWT denylist (apps/users/tokens.py) relies on.
+CACHE_REDIS = os.getenv("CACHE_REDIS", "")
+if CACHE_REDIS:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS,
+        }
+    }
+
+# Number of counter rows per prayer used by the "pray" action
+PRAYER_COUNT_SHARDS = int(os.getenv("PRAYER_COUNT_SHARDS", "8"))
+
+# How long deleted prayers are remembered for delta sync
+PRAYER_SYNC_RETENTION_DAYS = int(os.getenv("PRAYER_SYNC_RETENTION_DAYS", "30"))
+
+# Text search configuration of prayer search (PostgreSQL only).
+# Existing prayers keep their vectors until saved again.
+PRAYER_SEARCH_CONFIG = os.getenv("PRAYER_SEARCH_CONFIG", "english")
+
+# Render GET prayer lists from .values() rows (apps/prayer/rows.py)
+PRAYER_LIST_FAST_PATH = os.getenv("PRAYER_LIST_FAST_PATH", "True") == "True"
+
+# Async dispatch of the viewsets with async actions (apps/common/views.py).
+# Enabled by config/asgi.py; under WSGI the views stay sync.
+ASYNC_VIEWS_ENABLED = os.getenv("ASYNC_VIEWS_ENABLED", "False") == "True"
+
+# Realtime events (apps/prayer/realtime.py). Without REALTIME_REDIS the
+# broker is in-process, so only clients of the same process get events.
+REALTIME_REDIS = os.getenv("REALTIME_REDIS", "")
+REALTIME_COALESCE_SECONDS = float(
+    os.getenv("REALTIME_COALESCE_SECONDS", "1.0")
+)
+
+# Background tasks (apps/common/tasks.py)
+BACKGROUND_TASK_WORKERS = int(os.getenv("BACKGROUND_TASK_WORKERS", "2"))
+BACKGROUND_TASKS_EAGER = os.getenv("BACKGROUND_TASKS_EAGER", "False") == "True"
+
+# Materialized home feed (apps/prayer/feed.py). Groups with more members
+# than FEED_FANOUT_MAX_MEMBERS are read from the group instead.
+FEED_MATERIALIZATION_ENABLED = (
+    os.getenv("FEED_MATERIALIZATION_ENABLED", "False") == "True"
+)
+FEED_FANOUT_MAX_MEMBERS = int(os.getenv("FEED_FANOUT_MAX_MEMBERS", "1000"))
+
+# Query cache (apps/common/cache.py).
+# Uses django-cacheops when CACHEOPS_REDIS is set,
+# otherwise the local in-memory fallback.
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "False") == "True"
+CACHEOPS_REDIS = os.getenv("CACHEOPS_REDIS", "")
+CACHEOPS_ENABLED = QUERY_CACHE_ENABLED and bool(CACHEOPS_REDIS)
+CACHEOPS_DEGRADE_ON_FAILURE = True
+CACHEOPS_DEFAULTS = {"timeout": 60 * 15}
+CACHEOPS = {
+    "prayer.prayercategory": {"ops": "all", "timeout": 60 * 60},
+    "prayer.group": {"ops": ()},
+    "prayer.groupmembership": {"ops": ()},
+    "prayer.membershiprequest": {"ops": ()},
+}
+if CACHEOPS_ENABLED:
+    INSTALLED_APPS += ["cacheops"]
+
+# Seconds a user's {group_id: role} map may be reused across requests
+MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv("MEMBERSHIP_CACHE_TIMEOUT", "60"))
+
 # Spectacular API settings
 SPECTACULAR_SETTINGS = {
     "TITLE": "Prayer API",
@@ -1,17 +1,35 @@
 from .base import *  # noqa
-from .base import BASE_DIR
+from .base import BASE_DIR, DATABASE_REPLICAS
 
 # Override database settings for local development
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # A file rather than in-memory SQLite, so tests can write from
+        # several threads (in-memory shared cache locks whole tables)
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
+# Replicas are further SQLite files here, e.g. copies of db.sqlite3
+# or databases created with migrate --database
+DATABASES.update(
+    {
+        alias: {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / f"db.{alias}.sqlite3",
+            "TEST": {"MIRROR": "default"},
+        }
+        for alias in DATABASE_REPLICAS
+    }
+)
 
 # Set debug to True for local development
 DEBUG = True
 
+# Run background tasks inline
+BACKGROUND_TASKS_EAGER = True
+
 # Allow all hosts in local development
 ALLOWED_HOSTS = ["*"]
 
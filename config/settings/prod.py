@@ -1,6 +1,12 @@
 import os
 
 from .base import *  # noqa
+from .base import (
+    DATABASE_CONNECTION_OPTIONS,
+    POSTGRES_ENGINE,
+    REST_FRAMEWORK,
+    replica_databases,
+)
 
 DEBUG = False
 ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
@@ -9,7 +15,7 @@ ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
 # Database settings
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": POSTGRES_ENGINE,
         "NAME": os.getenv("POSTGRES_DB"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
@@ -18,8 +24,15 @@ DATABASES = {
         "OPTIONS": {
             "sslmode": "require",
         },
+        **DATABASE_CONNECTION_OPTIONS,
     }
 }
+DATABASES.update(replica_databases(DATABASES["default"]))
+
+# JSON only, no browsable API
+REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
+    "apps.common.renderers.FastJSONRenderer",
+)
 
 # Security settings
 SECURE_SSL_REDIRECT = True
@@ -17,6 +17,7 @@ urlpatterns = [
             [
                 path("", include("apps.users.urls")),
                 path("", include("apps.prayer.urls")),
+                path("", include("apps.common.urls")),
             ]
         ),
     ),